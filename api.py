@@ -0,0 +1,221 @@
+"""HTTP API serving every section as JSON or Arrow, from the same caches as the app
+
+    python api.py --port 8502
+
+    GET /sections                                      available sections
+    GET /sections/<section>/<year>/<round>             one section of a race
+    GET /sections/races_data/<year>                    season-wide sections need no round
+
+Query parameters: columns=Driver,Lap%20Time  offset=0  limit=1000  format=json|arrow
+(or Accept: application/vnd.apache.arrow.stream). Responses are gzipped when
+the client accepts it and carry an ETag for If-None-Match revalidation.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pandas as pd
+import pyarrow as pa
+from app import SECTION_REQUIREMENTS
+from availability import SessionUnavailableError
+from cache_manager import NotCachedError
+from exports import convert_to_serializable, encode_durations
+from fetcher import SECTION_FETCHERS, fetch_section
+
+API_HOST = os.environ.get("F1RDF_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("F1RDF_API_PORT", 8502))
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 100000
+# Smaller bodies are sent uncompressed; gzip would barely help
+GZIP_MIN_BYTES = 1024
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# id(result) -> (weak reference, content digest); results are shared and read-only, so one hash each
+_digests = {}
+_digests_lock = threading.Lock()
+
+def content_digest(data):
+    """Get a digest of a section result, computed once per cached result object"""
+    with _digests_lock:
+        entry = _digests.get(id(data))
+        if entry is not None and entry[0]() is data:
+            return entry[1]
+
+    if isinstance(data, pd.DataFrame):
+        hasher = hashlib.sha1(json.dumps([str(c) for c in data.columns]).encode())
+        hasher.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    else:
+        hasher = hashlib.sha1(json.dumps(convert_to_serializable(data), default=str, sort_keys=True).encode())
+    digest = hasher.hexdigest()
+
+    try:
+        reference = weakref.ref(data, lambda _, key=id(data): _digests.pop(key, None))
+    except TypeError:
+        return digest  # dicts cannot be weakly referenced; hashing them is cheap
+    with _digests_lock:
+        _digests[id(data)] = (reference, digest)
+    return digest
+
+def select(data, columns=None, offset=0, limit=DEFAULT_LIMIT):
+    """Project and paginate a section table"""
+    if columns:
+        missing = [c for c in columns if c not in data.columns]
+        if missing:
+            raise ApiError(400, f"Unknown columns: {', '.join(missing)}")
+        data = data[columns]
+    return data.iloc[offset:offset + limit]
+
+def render_json(data, total, offset, limit):
+    if not isinstance(data, pd.DataFrame):
+        return json.dumps(convert_to_serializable(data), default=str).encode()
+    rows = encode_durations(data, "ms").to_json(orient='records', date_format='iso')
+    head = json.dumps({'total_rows': total, 'offset': offset, 'limit': limit, 'columns': [str(c) for c in data.columns]})
+    # Splice the rows in without parsing pandas' output again
+    return (head[:-1] + ', "rows": ' + rows + '}').encode()
+
+def render_arrow(data):
+    if not isinstance(data, pd.DataFrame):
+        raise ApiError(406, "This section is not a table; request it as JSON")
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def _int_param(params, name, default, maximum=None):
+    try:
+        value = int(params.get(name, [default])[0])
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer")
+    if value < 0:
+        raise ApiError(400, f"{name} must not be negative")
+    return min(value, maximum) if maximum is not None else value
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "F1RDF-API/1.0"
+
+    def do_GET(self):
+        try:
+            self._route()
+        except ApiError as e:
+            self._send_error(e.status, str(e))
+        except SessionUnavailableError as e:
+            self._send_error(404, str(e))
+        except NotCachedError as e:
+            self._send_error(503, str(e), {'Retry-After': '30'})
+        except Exception as e:
+            self._send_error(500, str(e))
+
+    def _route(self):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split('/') if p]
+        if parts == ['sections']:
+            listing = {section: SECTION_REQUIREMENTS.get(section, ('schedule',))[0] for section in SECTION_FETCHERS}
+            return self._send(200, json.dumps(listing).encode(), "application/json")
+        if len(parts) not in (3, 4) or parts[0] != 'sections':
+            raise ApiError(404, "Use /sections/<section>/<year>/<round>")
+
+        section = parts[1]
+        if section not in SECTION_FETCHERS:
+            raise ApiError(404, f"Unknown section: {section}")
+        try:
+            year = int(parts[2])
+            round_number = int(parts[3]) if len(parts) == 4 else None
+        except ValueError:
+            raise ApiError(400, "Year and round must be integers")
+        if round_number is None:
+            if section in SECTION_REQUIREMENTS:
+                raise ApiError(400, f"{section} needs a round: /sections/{section}/{year}/<round>")
+            round_number = 0
+
+        params = parse_qs(url.query)
+        columns = [c for c in params.get('columns', [''])[0].split(',') if c] or None
+        offset = _int_param(params, 'offset', 0)
+        limit = _int_param(params, 'limit', DEFAULT_LIMIT, MAX_LIMIT)
+        fmt = params.get('format', [None])[0] or ('arrow' if ARROW_MIME in self.headers.get('Accept', '') else 'json')
+        if fmt not in ('json', 'arrow'):
+            raise ApiError(400, "format must be json or arrow")
+
+        data = fetch_section(section, year, round_number)
+        if data is None:
+            raise ApiError(404, f"No {section} data for {year} round {round_number}")
+        if isinstance(data, str) and data.startswith("Error"):
+            raise ApiError(500, data)
+
+        # Revalidation only needs the cached result's digest, not a serialized body
+        etag = '"' + hashlib.sha1(json.dumps(
+            [content_digest(data), section, year, round_number, columns, offset, limit, fmt]
+        ).encode()).hexdigest() + '"'
+        if etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+            return self._send(304, b"", None, {'ETag': etag})
+
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if isinstance(data, pd.DataFrame):
+            headers['X-Total-Count'] = str(len(data))
+            page = select(data, columns, offset, limit)
+        else:
+            page = data
+        if fmt == 'arrow':
+            body, mime = render_arrow(page), ARROW_MIME
+        else:
+            total = len(data) if isinstance(data, pd.DataFrame) else None
+            body, mime = render_json(page, total, offset, limit), "application/json"
+        self._send(200, body, mime, headers)
+
+    def _send(self, status, body, mime, headers=None):
+        headers = dict(headers or {})
+        if body and len(body) >= GZIP_MIN_BYTES and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body, compresslevel=5)
+            headers['Content-Encoding'] = 'gzip'
+        self.send_response(status)
+        if mime:
+            self.send_header('Content-Type', mime)
+        headers['Vary'] = 'Accept, Accept-Encoding'
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _send_error(self, status, message, headers=None):
+        self._send(status, json.dumps({'error': message}).encode(), "application/json", headers)
+
+    def log_message(self, format, *args):
+        if os.environ.get("F1RDF_API_LOG") == "1":
+            super().log_message(format, *args)
+
+def make_server(host=API_HOST, port=API_PORT):
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.daemon_threads = True
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve F1 data sections over HTTP")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    args = parser.parse_args()
+    server = make_server(args.host, args.port)
+    print(f"Serving on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -1,45 +1,271 @@
-import fastf1
 import pandas as pd
+import functools
 import os
-from pathlib import Path
-
-# Setup cache directory
-try:
-    CACHE_DIR = Path("D:/umer/Fast F1 App 🚗/cache")
-    # Create cache directory if it doesn't exist
-    if not CACHE_DIR.exists():
-        os.makedirs(CACHE_DIR)
-    
-    # Enable FastF1 cache
-    fastf1.Cache.enable_cache(CACHE_DIR)
-except Exception as e:
-    print(f"Error setting up cache: {str(e)}")
+from cache_manager import CACHE_MANAGER, NotCachedError, load_fastf1
+from session_cache import SessionCache
+from schedule_store import ScheduleStore
+from table_store import TableStore
+from standings import PointsLedger, driver_standings, constructor_standings
+from lap_analysis import analyze_laps, stint_summary
+from pit_stops import PitStopIndex, pair_pit_stops, fastest_stops
+from event_index import EventIndex
+from freshness import Freshness
+from availability import TIMING_DATA_FIRST_SEASON, Availability, SessionUnavailableError
+from history_db import HistoryDB
+from telemetry import DEFAULT_RESOLUTION, downsample_telemetry
+from metrics import METRICS, timed
+from refresh_queue import RefreshQueue
+from result_cache import ResultCache
+
+# FastF1 and its disk cache (location and size budget from F1RDF_CACHE_* env vars) are set up by
+# load_fastf1() on first use, so starting the app and serving stored tables never import them
+
+# Loaded sessions shared by every getter (and every Streamlit session in this process)
+SESSION_CACHE = SessionCache(max_sessions=int(os.environ.get("F1RDF_SESSION_CACHE_SIZE", 8)))
+
+# Section results shared by every Streamlit session, keyed by (year, round, section)
+RESULT_CACHE = ResultCache(
+    max_entries=int(os.environ.get("F1RDF_RESULT_CACHE_SIZE", 256)),
+    ttl=int(os.environ.get("F1RDF_RESULT_CACHE_TTL", 15 * 60))
+)
+
+# Optional parts of Session.load(); results are always loaded
+LOAD_PARTS = ('laps', 'telemetry', 'weather', 'messages')
+
+# Session type and data parts each section reads, so we only load what is shown
+SECTION_REQUIREMENTS = {
+    'race_results': ('R', {'results'}),
+    'driver_standings': ('R', {'results'}),
+    'constructor_results': ('R', {'results'}),
+    'constructor_standings': ('R', {'results'}),
+    'constructors_data': ('R', {'results'}),
+    'drivers_data': ('R', {'results'}),
+    'lap_times': ('R', {'results', 'laps'}),
+    'pit_stops': ('R', {'results', 'laps'}),
+    'lap_analysis': ('R', {'results', 'laps'}),
+    'stint_summary': ('R', {'results', 'laps'}),
+    'qualifying_results': ('Q', {'results'}),
+    'sprint_results': ('S', {'results'}),
+    'status_data': ('R', {'results'})
+}
+
+# Materialized per-section tables; warm reads skip FastF1 entirely
+TABLE_STORE = TableStore(
+    CACHE_MANAGER.cache_dir / "tables",
+    enabled=os.environ.get("F1RDF_TABLE_STORE", "1") != "0"
+)
+
+# Downloads queued by offline-first mode instead of blocking a request
+REFRESH_QUEUE = RefreshQueue()
+
+def _not_cached(key, parts):
+    REFRESH_QUEUE.submit(*key, parts)
+    return NotCachedError(f"Not cached: {key[0]} round {key[1]} {key[2]} is being downloaded in the background, "
+                          "try again shortly")
+
+def _indexed_event(year, round_number):
+    # Schedule row of an event from the event index, or None when it cannot be looked up
+    try:
+        events = EVENT_INDEX.events(year)
+    except Exception:
+        return None
+    match = events[events['RoundNumber'] == round_number]
+    return match.iloc[0] if len(match) else None
+
+# Which sessions and data parts exist for a round, with confirmed absences remembered
+AVAILABILITY = Availability(_indexed_event)
+
+# Schedule-based freshness of each session plus fingerprints of its downloaded data
+FRESHNESS = Freshness(CACHE_MANAGER.cache_dir / "freshness.json", _indexed_event)
+
+def _needs_refresh(key, parts):
+    # Recent sessions past their TTL are downloaded again; offline-first serves the cached copy meanwhile
+    if not FRESHNESS.needs_refresh(*key):
+        return False
+    if CACHE_MANAGER.offline_first:
+        REFRESH_QUEUE.submit(*key, parts)
+        return False
+    return True
+
+def _is_stale(year, round_number, section):
+    # Stored tables of a session due for a refresh are rebuilt from the refreshed session
+    session_type, parts = SECTION_REQUIREMENTS[section]
+    return _needs_refresh((int(year), int(round_number), session_type), parts)
+
+TABLE_STORE.is_stale = _is_stale
+
+def get_loaded_session(year, round_number, session_type, parts=('results',)):
+    """Get a FastF1 session with at least the given data parts loaded
+
+    Sessions or parts that cannot exist for the event (no sprint, no timing
+    data before 2018) raise SessionUnavailableError without touching FastF1.
+    In offline-first mode a session missing from the disk cache raises
+    NotCachedError right away and is downloaded in the background.
+    """
+    key = (int(year), int(round_number), session_type)
+    parts = set(parts)
+    # Telemetry is sliced per lap, so it is useless without laps
+    if 'telemetry' in parts:
+        parts.add('laps')
+    AVAILABILITY.check(*key, parts)
+    refresh = _needs_refresh(key, parts)
+    if refresh:
+        SESSION_CACHE.invalidate(key)
+    changed = set()
+
+    def _load(session, loaded):
+        if session is None:
+            with timed('get_session'):
+                try:
+                    session = load_fastf1().get_session(*key)
+                except Exception as e:
+                    if isinstance(e, ValueError) and "does not exist" in str(e):
+                        # FastF1 confirmed the event has no such session
+                        AVAILABILITY.mark_absent(*key, str(e))
+                        raise SessionUnavailableError(str(e)) from None
+                    # Offline, this fails when the season schedule was never downloaded
+                    if CACHE_MANAGER.offline_first:
+                        raise _not_cached(key, loaded) from None
+                    raise
+        if CACHE_MANAGER.offline_first and not CACHE_MANAGER.has_parts(session, loaded):
+            raise _not_cached(key, loaded) from None
+        if refresh:
+            # FastF1 only re-downloads a session whose parsed files are gone, and its
+            # raw responses are bypassed while loading so late changes are picked up
+            CACHE_MANAGER.clear_session(session)
+        was_cached = CACHE_MANAGER.is_cached(session)
+        downloaded = not CACHE_MANAGER.has_parts(session, loaded)
+        with timed('load'), CACHE_MANAGER.fresh_responses(refresh):
+            session.load(**{part: part in loaded for part in LOAD_PARTS})
+        CACHE_MANAGER.record_access(session, was_cached)
+        if downloaded or not FRESHNESS.has_fingerprints(key, loaded):
+            changed.update(FRESHNESS.record(key, session, loaded, downloaded))
+        return session
+
+    session = SESSION_CACHE.get(key, _load, parts)
+    # Only tables built from data that actually changed are invalidated. This takes the
+    # season index locks, so it must run after the session lock above is released
+    invalidate_changed(key, changed)
+    return session
+
+def refresh_session(year, round_number, session_type, parts=('results',)):
+    """Load a session, downloading it again if it is due, and get the data parts that changed"""
+    key = (int(year), int(round_number), session_type)
+    before = FRESHNESS.digests(key)
+    get_loaded_session(*key, parts)
+    after = FRESHNESS.digests(key)
+    return {part for part, digest in after.items() if before.get(part) != digest}
+
+def invalidate_changed(key, changed):
+    """Drop the stored tables, shared results and season indexes built from changed parts of a session"""
+    if not changed:
+        return
+    year, round_number, session_type = key
+    # A section depends on laps if it reads them, otherwise only on the results
+    sections = [section for section, (section_type, parts) in SECTION_REQUIREMENTS.items()
+                if section_type == session_type and ('laps' if 'laps' in parts else 'results') in changed]
+    TABLE_STORE.invalidate_sections(year, round_number, sections)
+    RESULT_CACHE.invalidate([(year, round_number, section) for section in sections])
+    if 'results' in changed and session_type in ('R', 'S'):
+        # Points of this round count towards the standings after every later round
+        POINTS_LEDGER.invalidate(year, round_number)
+        standings = ('driver_standings', 'constructor_standings')
+        RESULT_CACHE.invalidate_where(lambda k: k[0] == year and k[1] >= round_number and k[2] in standings)
+    if 'laps' in changed and session_type == 'R':
+        PIT_STOP_INDEX.invalidate(year, round_number)
+
+def _refreshed(key, changed):
+    # A background refresh replaced the session on disk; drop what this process holds of it
+    SESSION_CACHE.invalidate(key)
+    invalidate_changed(key, changed)
+
+REFRESH_QUEUE.on_done.append(_refreshed)
+
+# Results, qualifying and standings of seasons without timing data, served without FastF1 sessions
+HISTORY_DB = HistoryDB(CACHE_MANAGER.cache_dir / "history.sqlite", enabled=os.environ.get("F1RDF_HISTORY_DB", "1") != "0")
+
+def is_historical(year):
+    """Check whether a season is served from the local history database"""
+    return HISTORY_DB.enabled and int(year) < TIMING_DATA_FIRST_SEASON
+
+def get_section_results(section, year, round_number):
+    """Get the results table a results-only section reads, from the history database for old seasons"""
+    if is_historical(year):
+        if SECTION_REQUIREMENTS[section][0] == 'Q':
+            return HISTORY_DB.qualifying_results(year, round_number)
+        return HISTORY_DB.race_results(year, round_number)
+    return get_section_session(section, year, round_number).results
+
+def get_section_session(section, year, round_number):
+    """Get the session a section reads, loaded with just what that section needs"""
+    session_type, parts = SECTION_REQUIREMENTS[section]
+    return get_loaded_session(year, round_number, session_type, parts)
+
+# Cache counters exported with the section timings
+METRICS.register_collector('session_cache', lambda: SESSION_CACHE.stats())
+METRICS.register_collector('table_store', lambda: {'hits': TABLE_STORE.hits, 'misses': TABLE_STORE.misses})
+METRICS.register_collector('result_cache', lambda: RESULT_CACHE.stats())
+METRICS.register_collector('refresh_queue', lambda: REFRESH_QUEUE.stats())
+METRICS.register_collector('disk_cache', lambda: {
+    'hits': CACHE_MANAGER.hits, 'misses': CACHE_MANAGER.misses, 'evictions': CACHE_MANAGER.evictions
+})
+
+def get_unavailable_sections(year, round_number):
+    """Get {section: reason} for the sections that cannot exist for a round"""
+    return AVAILABILITY.unavailable_sections(year, round_number, SECTION_REQUIREMENTS)
+
+def get_session_cache_stats():
+    """Get hit/miss counts of the shared session cache"""
+    return SESSION_CACHE.stats()
+
+# Event schedules shared by the sidebar and the schedule-based getters
+SCHEDULE_STORE = ScheduleStore(
+    lambda year: load_fastf1().get_event_schedule(year),
+    past_ttl=int(os.environ.get("F1RDF_SCHEDULE_TTL_PAST", 24 * 3600)),
+    current_ttl=int(os.environ.get("F1RDF_SCHEDULE_TTL_CURRENT", 15 * 60))
+)
 
 def load_schedule(year):
-    schedule = fastf1.get_event_schedule(year)
-    return schedule
+    return SCHEDULE_STORE.get(year)
+
+# Events of every season on disk, so the sidebar and cross-year search need no schedule fetch
+EVENT_INDEX = EventIndex(
+    CACHE_MANAGER.cache_dir / "event_index.parquet",
+    load_schedule,
+    current_ttl=int(os.environ.get("F1RDF_SCHEDULE_TTL_CURRENT", 15 * 60))
+)
+
+# Points scored per race and sprint, persisted so standings only load new rounds
+POINTS_LEDGER = PointsLedger(
+    CACHE_MANAGER.cache_dir / "ledger",
+    lambda year, round_number, session_type: (
+        load_race_results(year, round_number) if session_type == 'R' else get_sprint_results(year, round_number)
+    ),
+    load_schedule
+)
 
+# Paired pit stops of every race, so season-wide queries never load sessions
+PIT_STOP_INDEX = PitStopIndex(
+    CACHE_MANAGER.cache_dir / "pit_stops",
+    lambda year, round_number, session_type: get_pit_stops(year, round_number),
+    load_schedule
+)
+
+@TABLE_STORE.materialized('race_results')
 def load_race_results(year, round_number):
     """Get complete race results for a specific race"""
-    session = fastf1.get_session(year, round_number, 'R')
-    session.load()
-    return session.results
+    return get_section_results('race_results', year, round_number)
 
 def get_driver_standings(year, round_number):
-    """Get driver standings for a specific race"""
-    session = fastf1.get_session(year, round_number, 'R')
-    session.load()
-    
-    # Get results with specified columns and sort by position
-    standings = session.results[['DriverId', 'Abbreviation', 'FullName', 'TeamName', 'Points', 'Position']]
-    standings = standings.sort_values('Position')
-    standings.columns = ['Driver ID', 'Abbreviation', 'Full Name', 'Team', 'Points', 'Position']
-    return standings
+    """Get the drivers' championship standings after a specific race (sprints included)"""
+    if is_historical(year):
+        # Official standings apply each era's dropped-scores rules
+        return HISTORY_DB.driver_standings(year, round_number)
+    return driver_standings(POINTS_LEDGER.get(year, round_number))
 
 def get_circuit_info(year, round_number):
     """Get circuit information for a specific race"""
-    schedule = fastf1.get_event_schedule(year)
-    circuit_info = schedule[schedule['RoundNumber'] == round_number].iloc[0]
+    circuit_info = SCHEDULE_STORE.get_event(year, round_number)
     
     # Get all sessions info
     sessions = {
@@ -79,44 +305,45 @@ def get_circuit_info(year, round_number):
         'sessions': sessions
     }
 
+@TABLE_STORE.materialized('constructor_results')
 def get_constructor_results(year, round_number):
     """Get constructor results for a specific race"""
-    session = fastf1.get_session(year, round_number, 'R')
-    session.load()
+    results = get_section_results('constructor_results', year, round_number)
+    if results is None:
+        return None
     
     # Get constructor results with specified columns
-    constructor_results = session.results[['DriverId', 'TeamName', 'FullName', 'Position', 'Points', 'Status', 'Time']]
+    constructor_results = results[['DriverId', 'TeamName', 'FullName', 'Position', 'Points', 'Status', 'Time']]
     constructor_results.columns = ['Driver ID', 'Team', 'Full Name', 'Position', 'Points', 'Status', 'Time']
     return constructor_results
 
 def get_constructor_standings(year, round_number):
-    """Get constructor standings for a specific race"""
-    session = fastf1.get_session(year, round_number, 'R')
-    session.load()
-    
-    # Get constructor standings with specified columns
-    standings = session.results[['DriverId', 'TeamName', 'FullName', 'Position', 'Points', 'Status', 'Time']]
-    standings = standings.sort_values('Points', ascending=False)  # Sort by points
-    standings.columns = ['Driver ID', 'Team', 'Full Name', 'Position', 'Points', 'Status', 'Time']
-    return standings
+    """Get the constructors' championship standings after a specific race (sprints included)"""
+    if is_historical(year):
+        return HISTORY_DB.constructor_standings(year, round_number)
+    return constructor_standings(POINTS_LEDGER.get(year, round_number))
 
+@TABLE_STORE.materialized('constructors_data')
 def get_constructors_data(year, round_number):
     """Get unique constructors/teams data for a specific race"""
-    session = fastf1.get_session(year, round_number, 'R')
-    session.load()
+    results = get_section_results('constructors_data', year, round_number)
+    if results is None:
+        return None
     
     # Get unique constructors with specified column
-    constructors = session.results[['TeamName']].drop_duplicates()
+    constructors = results[['TeamName']].drop_duplicates()
     constructors.columns = ['Team Name']
     return constructors
 
+@TABLE_STORE.materialized('drivers_data')
 def get_drivers_data(year, round_number):
     """Get drivers data for a specific race"""
-    session = fastf1.get_session(year, round_number, 'R')
-    session.load()
+    results = get_section_results('drivers_data', year, round_number)
+    if results is None:
+        return None
     
     # Get drivers data with specified columns
-    drivers = session.results[[
+    drivers = results[[
         'DriverNumber', 'DriverId', 'Abbreviation',
         'FirstName', 'LastName', 'FullName', 'TeamName'
     ]].drop_duplicates()
@@ -127,10 +354,10 @@ def get_drivers_data(year, round_number):
     ]
     return drivers
 
+@TABLE_STORE.materialized('lap_times')
 def get_lap_times(year, round_number):
     """Get lap times data with sector times for a specific race"""
-    session = fastf1.get_session(year, round_number, 'R')
-    session.load()
+    session = get_section_session('lap_times', year, round_number)
     
     # Get lap times with specified columns
     lap_times = session.laps[[
@@ -144,31 +371,47 @@ def get_lap_times(year, round_number):
     ]
     return lap_times
 
+@TABLE_STORE.materialized('lap_analysis')
+def get_lap_analysis(year, round_number):
+    """Get rolling pace, deltas to the session best and gaps to the leader for every lap of a race"""
+    session = get_section_session('lap_analysis', year, round_number)
+    return analyze_laps(session.laps)
+
+@TABLE_STORE.materialized('stint_summary')
+def get_stint_summary(year, round_number):
+    """Get every driver's tyre stints with mean pace and degradation for a race"""
+    session = get_section_session('stint_summary', year, round_number)
+    return stint_summary(session.laps)
+
+def get_season_lap_analysis(year, rounds):
+    """Get lap analysis for several rounds of a season in one table"""
+    frames = [get_lap_analysis(year, round_number).assign(Round=int(round_number)) for round_number in rounds]
+    return pd.concat(frames, ignore_index=True)
+
+@TABLE_STORE.materialized('pit_stops', version=2)
 def get_pit_stops(year, round_number):
-    """Get pit stops data for a specific race"""
-    session = fastf1.get_session(year, round_number, 'R')
-    session.load()
-    
-    # Get pit stops data with specified columns
-    laps = session.laps
-    pit_stops = laps[laps['PitOutTime'].notna()][
-        ['Driver', 'LapNumber', 'PitOutTime', 'PitInTime']
-    ].copy()
-    
+    """Get pit stops with pit lane time for a specific race"""
+    session = get_section_session('pit_stops', year, round_number)
+    pit_stops = pair_pit_stops(session.laps)
+
     # Return None if no pit stops data available
     if pit_stops.empty:
         return None
-        
-    pit_stops.columns = ['Driver', 'Lap Number', 'Pit Out Time', 'Pit In Time']
     return pit_stops
 
+def get_fastest_pit_stops(year, by='Team'):
+    """Get the fastest pit stop of a season per team (or per driver with by='Driver')"""
+    return fastest_stops(PIT_STOP_INDEX.get(year), by)
+
+@TABLE_STORE.materialized('qualifying_results')
 def get_qualifying_results(year, round_number):
     """Get qualifying results for a specific race"""
-    session = fastf1.get_session(year, round_number, 'Q')
-    session.load()
+    results = get_section_results('qualifying_results', year, round_number)
+    if results is None:
+        return None
     
     # Get qualifying results with specified columns
-    qualifying = session.results[[
+    qualifying = results[[
         'Abbreviation', 'DriverId', 'FullName', 'TeamName',
         'Q1', 'Q2', 'Q3', 'Position'
     ]]
@@ -181,7 +424,7 @@ def get_qualifying_results(year, round_number):
 
 def get_races_data(year):
     """Get races data from event schedule"""
-    events = fastf1.get_event_schedule(year)
+    events = load_schedule(year)
     
     # Get races data with specified columns
     races = events[[
@@ -197,7 +440,7 @@ def get_races_data(year):
 
 def get_season_data(year):
     """Get season schedule data"""
-    events = fastf1.get_event_schedule(year)
+    events = load_schedule(year)
     
     # Get season data with specified columns
     season = events[[
@@ -211,21 +454,36 @@ def get_season_data(year):
     ]
     return season
 
+@TABLE_STORE.materialized('sprint_results')
 def get_sprint_results(year, round_number):
     """Get complete sprint race results"""
     try:
-        session = fastf1.get_session(year, round_number, 'S')
-        session.load()
-        return session.results
-    except:
-        return None  # Return None if no sprint race data available
+        session = get_section_session('sprint_results', year, round_number)
+    except SessionUnavailableError:
+        return None  # No sprint at this event
+    return session.results
 
+@TABLE_STORE.materialized('status_data')
 def get_status_data(year, round_number):
     """Get race completion status data"""
-    session = fastf1.get_session(year, round_number, 'R')
-    session.load()
+    results = get_section_results('status_data', year, round_number)
+    if results is None:
+        return None
     
     # Get status data with specified columns
-    status = session.results[['Abbreviation', 'FullName', 'Status']]
+    status = results[['Abbreviation', 'FullName', 'Status']]
     status.columns = ['Abbreviation', 'Full Name', 'Status']
     return status
+
+@functools.lru_cache(maxsize=int(os.environ.get("F1RDF_TELEMETRY_CACHE_SIZE", 64)))
+def get_lap_telemetry(year, round_number, driver, lap_number, resolution=DEFAULT_RESOLUTION, session_type='R'):
+    """Get LTTB-downsampled telemetry of one driver's lap, keyed by channel
+
+    Car and position data are only loaded when a lap is first requested; FastF1
+    loads them for the whole session, so other drivers and laps are then cheap.
+    """
+    session = get_loaded_session(year, round_number, session_type, ('laps', 'telemetry'))
+    lap = session.laps.pick_drivers(driver).pick_laps(int(lap_number))
+    if lap.empty:
+        return None
+    return downsample_telemetry(lap.iloc[0].get_telemetry(), resolution=resolution)
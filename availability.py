@@ -0,0 +1,91 @@
+import threading
+import pandas as pd
+from freshness import session_type_of
+
+# First season FastF1 has lap timing, telemetry, weather and race control data for
+TIMING_DATA_FIRST_SEASON = 2018
+SPRINT_FIRST_SEASON = 2021
+
+PART_FIRST_SEASON = {part: TIMING_DATA_FIRST_SEASON for part in ('laps', 'telemetry', 'weather', 'messages')}
+
+SESSION_LABELS = {'R': 'race', 'Q': 'qualifying session', 'S': 'sprint'}
+
+
+class SessionUnavailableError(ValueError):
+    """Raised when a session or data part does not exist for an event"""
+
+
+class Availability:
+    """Decides from the schedule which sessions and data parts exist for a round
+
+    Uses the event's format and session names plus each season's data
+    coverage, so impossible requests fail without touching FastF1. Confirmed
+    absences are remembered; sessions that have not taken place yet are not.
+    """
+
+    def __init__(self, event_loader):
+        # event_loader(year, round_number) -> schedule row, or None if unknown
+        self.event_loader = event_loader
+        self._lock = threading.Lock()
+        # (year, round, session type) -> reason
+        self._absent = {}
+
+    def mark_absent(self, year, round_number, session_type, reason):
+        """Remember that a session does not exist (e.g. after FastF1 rejected it)"""
+        with self._lock:
+            self._absent[(int(year), int(round_number), session_type)] = reason
+
+    def _session_reason(self, year, round_number, session_type):
+        key = (year, round_number, session_type)
+        with self._lock:
+            if key in self._absent:
+                return self._absent[key]
+
+        event = self.event_loader(year, round_number)
+        if event is None:
+            return None  # Unknown event: let FastF1 decide
+
+        label = SESSION_LABELS[session_type]
+        names = [event.get(f'Session{i}') for i in range(1, 6)]
+        known = [name for name in names if isinstance(name, str) and name]
+        reason = None
+        if session_type == 'S' and (year < SPRINT_FIRST_SEASON or 'sprint' not in str(event.get('EventFormat', ''))):
+            reason = f"{event['EventName']} {year} has no {label}"
+        elif known and not any(session_type_of(year, name) == session_type for name in known):
+            reason = f"{event['EventName']} {year} has no {label}"
+        if reason is not None:
+            self.mark_absent(year, round_number, session_type, reason)
+            return reason
+
+        # Not remembered: the session will exist once it has been run
+        now = pd.Timestamp.now(tz='UTC').tz_localize(None)
+        for i, name in enumerate(names, 1):
+            if session_type_of(year, name) == session_type:
+                start = event.get(f'Session{i}DateUtc')
+                if start is not None and not pd.isna(start) and pd.Timestamp(start) > now:
+                    return f"The {event['EventName']} {year} {label} has not taken place yet"
+                break
+        return None
+
+    def reason(self, year, round_number, session_type, parts=('results',)):
+        """Get why a session with these data parts is unavailable, or None if it may exist"""
+        year, round_number = int(year), int(round_number)
+        for part in parts:
+            if year < PART_FIRST_SEASON.get(part, 0):
+                return f"{part.title()} data is only available from the {PART_FIRST_SEASON[part]} season onwards"
+        return self._session_reason(year, round_number, session_type)
+
+    def check(self, year, round_number, session_type, parts=('results',)):
+        """Raise SessionUnavailableError if the session or one of the parts cannot exist"""
+        reason = self.reason(year, round_number, session_type, parts)
+        if reason is not None:
+            raise SessionUnavailableError(reason)
+
+    def unavailable_sections(self, year, round_number, section_requirements):
+        """Get {section: reason} for every section that cannot be fetched for a round"""
+        unavailable = {}
+        for section, (session_type, parts) in section_requirements.items():
+            reason = self.reason(year, round_number, session_type, parts)
+            if reason is not None:
+                unavailable[section] = reason
+        return unavailable
@@ -0,0 +1,219 @@
+"""Offline benchmarks for every section getter and the Streamlit rerun path
+
+Record a fixture cache once (needs network):
+    python benchmarks/bench.py record --race 2024:5
+
+Run against it with FastF1 in offline mode and save the results:
+    python benchmarks/bench.py run --race 2024:5 --out bench_head.json
+
+Compare two runs (exits non-zero when a metric regresses beyond the threshold):
+    python benchmarks/bench.py compare bench_base.json bench_head.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURE_CACHE = Path(os.environ.get("F1RDF_BENCH_CACHE", ROOT / "benchmarks" / "fixtures" / "cache"))
+
+def parse_race(value):
+    year, round_number = value.split(':')
+    return int(year), int(round_number)
+
+def use_fixture_cache(offline):
+    """Point the app at the fixture cache; must run before app is imported"""
+    FIXTURE_CACHE.mkdir(parents=True, exist_ok=True)
+    os.environ["F1RDF_CACHE_DIR"] = str(FIXTURE_CACHE)
+    # Never evict fixture data while benchmarking
+    os.environ["F1RDF_CACHE_MAX_MB"] = str(1024 * 1024)
+    sys.path.insert(0, str(ROOT))
+    os.chdir(ROOT)
+    import fastf1
+    from cache_manager import CACHE_MANAGER
+    # Enable the app's cache first: enabling it afterwards would replace the offline HTTP session
+    CACHE_MANAGER.enable()
+    fastf1.Cache.offline_mode(offline)
+
+def reset_caches(scratch):
+    """Drop every in-process cache and point derived stores at an empty directory"""
+    import app
+    app.SESSION_CACHE.invalidate()
+    app.RESULT_CACHE.invalidate()
+    app.SCHEDULE_STORE.invalidate()
+    app.get_lap_telemetry.cache_clear()
+    app.TABLE_STORE.root = Path(scratch) / "tables"
+    for index, name in ((app.POINTS_LEDGER, "ledger"), (app.PIT_STOP_INDEX, "pit_stops")):
+        index.root = Path(scratch) / name
+        index._years.clear()
+
+def measure(fn):
+    """Run fn once, returning (seconds, peak traced bytes)"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        fn()
+    finally:
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak
+
+def bench_sections(year, round_number, repeat):
+    """Cold and warm latency and peak memory of every section getter"""
+    from fetcher import SECTION_FETCHERS
+    results = {}
+    for section, getter in SECTION_FETCHERS.items():
+        cold, warm, cold_peak, warm_peak = [], [], [], []
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory() as scratch:
+                reset_caches(scratch)
+                seconds, peak = measure(lambda: getter(year, round_number))
+                cold.append(seconds)
+                cold_peak.append(peak)
+                seconds, peak = measure(lambda: getter(year, round_number))
+                warm.append(seconds)
+                warm_peak.append(peak)
+        results[section] = {
+            'cold_s': statistics.median(cold),
+            'warm_s': statistics.median(warm),
+            'cold_peak_bytes': max(cold_peak),
+            'warm_peak_bytes': max(warm_peak)
+        }
+        print(f"{section:24} cold {results[section]['cold_s']:8.3f}s  warm {results[section]['warm_s']:8.4f}s")
+    return results
+
+def cold_start_seconds():
+    """Time importing everything ui.py needs in a fresh interpreter, as a server start does"""
+    code = "import time; t = time.perf_counter(); import app, fetcher, exports, telemetry; print(time.perf_counter() - t)"
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=ROOT, env=os.environ, text=True)
+    return float(output.strip().splitlines()[-1])
+
+def bench_ui(year, round_number, repeat):
+    """Time ui.py reruns with Streamlit's AppTest: idle page and the full results page"""
+    from streamlit.testing.v1 import AppTest
+    import app
+
+    cold_start = statistics.median(cold_start_seconds() for _ in range(repeat))
+
+    event_name = app.SCHEDULE_STORE.get_event(year, round_number)['EventName']
+    at = AppTest.from_file(str(ROOT / "ui.py"), default_timeout=600)
+    first, _ = measure(at.run)
+    at.sidebar.selectbox[0].set_value(year).run()
+    at.sidebar.selectbox[1].set_value(event_name).run()
+
+    idle = [measure(at.run)[0] for _ in range(repeat)]
+    at.button(key="select_all_btn").click().run()
+    fetch, fetch_peak = measure(at.button(key="fetch_btn").click().run)
+    results_page = [measure(at.run)[0] for _ in range(repeat)]
+    results = {
+        'cold_start_s': cold_start,
+        'first_run_s': first,
+        'idle_rerun_s': statistics.median(idle),
+        'fetch_all_s': fetch,
+        'fetch_all_peak_bytes': fetch_peak,
+        'results_rerun_s': statistics.median(results_page)
+    }
+    for name, value in results.items():
+        print(f"ui {name:22} {value:10.3f}")
+    return results
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(args):
+    use_fixture_cache(offline=True)
+    import fastf1
+    year, round_number = parse_race(args.race)
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'fastf1': fastf1.__version__,
+            'race': args.race,
+            'repeat': args.repeat
+        },
+        'sections': bench_sections(year, round_number, args.repeat)
+    }
+    if not args.skip_ui:
+        report['ui'] = bench_ui(year, round_number, args.repeat)
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+        print(f"Wrote {args.out}")
+
+def record(args):
+    use_fixture_cache(offline=False)
+    from fetcher import SECTION_FETCHERS, fetch_sections
+    for race in args.race:
+        year, round_number = parse_race(race)
+        results = fetch_sections(year, round_number, list(SECTION_FETCHERS))
+        errors = {k: v for k, v in results.items() if isinstance(v, str) and v.startswith("Error")}
+        print(f"Recorded {race} into {FIXTURE_CACHE} ({len(results) - len(errors)} sections)")
+        for section, error in errors.items():
+            print(f"  {section}: {error}")
+
+def _flatten(report):
+    values = {}
+    for group in ('sections', 'ui'):
+        for name, metrics in report.get(group, {}).items():
+            if isinstance(metrics, dict):
+                values.update({f"{name}.{metric}": value for metric, value in metrics.items()})
+            else:
+                values[f"ui.{name}"] = metrics
+    return values
+
+def compare(args):
+    base = _flatten(json.loads(Path(args.base).read_text()))
+    head = _flatten(json.loads(Path(args.head).read_text()))
+    regressions = 0
+    print(f"{'metric':44} {'base':>12} {'head':>12} {'change':>8}")
+    for name in sorted(base.keys() & head.keys()):
+        before, after = base[name], head[name]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > args.threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{name:44} {before:12.4f} {after:12.4f} {change:+8.1%}{flag}")
+    raise SystemExit(1 if regressions else 0)
+
+def main():
+    parser = argparse.ArgumentParser(description="F1RDF offline benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="Download fixture races into the benchmark cache")
+    record_parser.add_argument("--race", nargs="+", default=["2024:5"], help="Races as YEAR:ROUND")
+    record_parser.set_defaults(func=record)
+
+    run_parser = commands.add_parser("run", help="Benchmark against the recorded cache (offline)")
+    run_parser.add_argument("--race", default="2024:5", help="Race as YEAR:ROUND")
+    run_parser.add_argument("--repeat", type=int, default=3, help="Repetitions per measurement (median)")
+    run_parser.add_argument("--skip-ui", action="store_true", help="Skip the Streamlit rerun benchmarks")
+    run_parser.add_argument("--out", help="Write the results as JSON")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head")
+    compare_parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative slowdown")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == '__main__':
+    main()
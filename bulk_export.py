@@ -0,0 +1,136 @@
+"""Export sections for every round of one or more seasons without the UI
+
+Example:
+    python bulk_export.py --years 2021-2023 --sections race_results lap_times --out exports
+
+Output is partitioned as <out>/<year>/round_<nn>/<section>.<format>. Finished rounds
+are recorded per format in <out>/_checkpoint.json, so re-running the same command
+after an interruption only exports the rounds that are still missing.
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+from exports import EXPORT_FORMATS, convert_to_serializable, section_filename, serialize
+
+CHECKPOINT_FILE = "_checkpoint.json"
+
+def parse_years(value):
+    """Parse '2023', '2021-2023' or '2019,2021-2023' into a sorted list of years"""
+    years = set()
+    for part in value.split(','):
+        if '-' in part:
+            start, end = part.split('-')
+            years.update(range(int(start), int(end) + 1))
+        else:
+            years.add(int(part))
+    return sorted(years)
+
+def list_rounds(year):
+    """Get the round numbers of a season that have already taken place"""
+    from app import load_schedule
+    schedule = load_schedule(year)
+    # Round 0 is pre-season testing
+    past = schedule[(schedule['RoundNumber'] > 0) & (schedule['EventDate'] < pd.Timestamp(datetime.now()))]
+    return [int(r) for r in past['RoundNumber']]
+
+def load_checkpoint(out_dir):
+    path = Path(out_dir) / CHECKPOINT_FILE
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def checkpoint_key(year, round_number, fmt):
+    return f"{year}-{round_number:02d}-{fmt}"
+
+def save_checkpoint(out_dir, checkpoint):
+    path = Path(out_dir) / CHECKPOINT_FILE
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def write_section(round_dir, section, data, fmt="csv"):
+    """Write one section to its partition, returning the file name or None"""
+    if data is None:
+        return None
+    if isinstance(data, dict):
+        path = round_dir / f"{section}.json"
+        path.write_text(json.dumps(convert_to_serializable(data), indent=2))
+    else:
+        path = round_dir / section_filename(section, fmt)
+        path.write_bytes(serialize(data, fmt))
+    return path.name
+
+def export_round(year, round_number, sections, out_dir, fmt="csv"):
+    """Fetch and write the given sections of one round (runs in a worker process)"""
+    from fetcher import fetch_sections
+    round_dir = Path(out_dir) / str(year) / f"round_{round_number:02d}"
+    round_dir.mkdir(parents=True, exist_ok=True)
+
+    done, failed = [], {}
+    for section, data in fetch_sections(year, round_number, sections, max_workers=2).items():
+        if isinstance(data, str) and data.startswith("Error"):
+            failed[section] = data
+            continue
+        write_section(round_dir, section, data, fmt)
+        done.append(section)
+    return year, round_number, done, failed
+
+def run_export(years, sections, out_dir, workers=None, fmt="csv"):
+    """Export sections for every finished round of the given years, resuming from the checkpoint"""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    checkpoint = load_checkpoint(out_dir)
+
+    jobs = []
+    for year in years:
+        for round_number in list_rounds(year):
+            exported = set(checkpoint.get(checkpoint_key(year, round_number, fmt), []))
+            missing = [s for s in sections if s not in exported]
+            if missing:
+                jobs.append((year, round_number, missing))
+
+    print(f"{len(jobs)} round(s) to export")
+    failures = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(export_round, year, round_number, missing, out_dir, fmt)
+                   for year, round_number, missing in jobs]
+        for future in as_completed(futures):
+            try:
+                year, round_number, done, failed = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"Round failed: {str(e)}")
+                continue
+
+            key = checkpoint_key(year, round_number, fmt)
+            checkpoint[key] = sorted(set(checkpoint.get(key, [])) | set(done))
+            # Save after every round so an interruption loses at most the rounds in flight
+            save_checkpoint(out_dir, checkpoint)
+            for section, error in failed.items():
+                failures += 1
+                print(f"{year} round {round_number} {section}: {error}")
+            print(f"{year} round {round_number}: {len(done)} section(s) exported")
+    return failures
+
+def main():
+    from fetcher import SECTION_FETCHERS
+    parser = argparse.ArgumentParser(description="Bulk export F1 data sections for whole seasons")
+    parser.add_argument("--years", required=True, help="Year, range or list, e.g. 2023 or 2019,2021-2023")
+    parser.add_argument("--sections", nargs="+", default=list(SECTION_FETCHERS),
+                        choices=list(SECTION_FETCHERS), help="Sections to export (default: all)")
+    parser.add_argument("--out", default="exports", help="Output directory")
+    parser.add_argument("--format", default="csv", choices=list(EXPORT_FORMATS), help="Table file format")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    failures = run_export(parse_years(args.years), args.sections, args.out, args.workers, args.format)
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
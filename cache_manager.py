@@ -0,0 +1,239 @@
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+# FastF1 cache layout: <cache dir>/<year>/<event>/<session>/*.ff1pkl
+CACHE_DIR = Path(os.environ.get("F1RDF_CACHE_DIR", Path(__file__).resolve().parent / "cache"))
+CACHE_MAX_MB = float(os.environ.get("F1RDF_CACHE_MAX_MB", 2048))
+# FastF1's raw HTTP responses (schedules, Ergast, timing streams) have their own budget
+HTTP_CACHE_MAX_MB = float(os.environ.get("F1RDF_HTTP_CACHE_MAX_MB", 512))
+HTTP_CACHE_FILE = "fastf1_http_cache.sqlite"
+PIN_FINISHED_SEASONS = os.environ.get("F1RDF_CACHE_PIN_FINISHED", "1") != "0"
+# Serve only cached data on the request path; downloads happen in a background refresh
+OFFLINE_FIRST = os.environ.get("F1RDF_OFFLINE_FIRST") == "1"
+
+# Parsed FastF1 files each Session.load() part needs, by API function name
+SESSION_PART_FILES = {
+    'results': ('driver_info',),
+    'laps': ('_extended_timing_data', 'timing_app_data'),
+    'telemetry': ('car_data', 'position_data'),
+    'weather': ('weather_data',),
+    'messages': ('race_control_messages',)
+}
+
+
+class NotCachedError(Exception):
+    """Raised in offline-first mode when a session is not in the disk cache yet"""
+
+
+class CacheManager:
+    """Size-bounded FastF1 disk cache with LRU eviction of session directories
+
+    A session directory's mtime is bumped whenever the app loads that session,
+    so eviction order follows actual use. Sessions of finished seasons can be
+    pinned because they never change and are the most expensive to re-download.
+    Only session directories count towards max_mb; FastF1's HTTP cache is
+    pruned of expired responses against http_max_mb, and the app's own stores
+    (tables, ledgers, indexes) are not managed here.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_mb=CACHE_MAX_MB, pin_finished=PIN_FINISHED_SEASONS,
+                 offline_first=OFFLINE_FIRST, http_max_mb=HTTP_CACHE_MAX_MB):
+        self.cache_dir = Path(cache_dir)
+        self.offline_first = offline_first
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.http_max_bytes = int(http_max_mb * 1024 * 1024)
+        self.pin_finished = pin_finished
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Called with (year, session_dir) after a session is evicted
+        self.on_evict = []
+        self._enabled = False
+        self._lock = threading.Lock()
+        # Per-thread flag: requests made while set skip FastF1's cached HTTP responses
+        self._refreshing = threading.local()
+
+    def enable(self):
+        """Create the cache directory and point FastF1 at it (only the first call does anything)"""
+        with self._lock:
+            if self._enabled:
+                return
+            self._enabled = True
+        import fastf1
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fastf1.Cache.enable_cache(str(self.cache_dir))
+        if self.offline_first:
+            # Cached HTTP responses (schedules, Ergast) are reused even when expired
+            fastf1.Cache.offline_mode(True)
+
+    def session_dir(self, session):
+        """Get the cache directory FastF1 uses for a session"""
+        # FastF1 drops the leading '/static/' of the API path
+        return self.cache_dir / session.api_path[8:].strip('/')
+
+    def is_cached(self, session):
+        """Check whether a session has parsed data in the disk cache"""
+        path = self.session_dir(session)
+        return path.is_dir() and any(path.glob('*.ff1pkl'))
+
+    def has_parts(self, session, parts):
+        """Check whether the disk cache holds everything needed to load the given parts"""
+        path = self.session_dir(session)
+        return all((path / f"{name}.ff1pkl").is_file()
+                   for part in parts for name in SESSION_PART_FILES.get(part, ()))
+
+    def clear_session(self, session):
+        """Delete a session's parsed files so the next load downloads it again"""
+        for path in self.session_dir(session).glob('*.ff1pkl'):
+            path.unlink(missing_ok=True)
+
+    def _hook_http_cache(self):
+        # Route FastF1's cached HTTP session through a check of the calling thread's refresh flag
+        import fastf1
+        http = fastf1.Cache._requests_session_cached
+        if http is None or getattr(http, 'f1rdf_hooked', False):
+            return
+        request = http.request
+
+        def refreshing_request(method, url, *args, **kwargs):
+            if getattr(self._refreshing, 'active', False):
+                kwargs.setdefault('force_refresh', True)
+            return request(method, url, *args, **kwargs)
+
+        http.request = refreshing_request
+        http.f1rdf_hooked = True
+
+    @contextmanager
+    def fresh_responses(self, active=True):
+        """Re-request, rather than replay, the HTTP responses this thread fetches inside the block
+
+        FastF1 keeps raw timing and Ergast responses for 12 hours, so deleting a
+        session's parsed files alone would re-parse the same data. Fresh
+        responses overwrite the cached ones for other processes too.
+        """
+        if not active:
+            yield
+            return
+        self._hook_http_cache()
+        self._refreshing.active = True
+        try:
+            yield
+        finally:
+            self._refreshing.active = False
+
+    def record_access(self, session, was_cached):
+        """Count a hit or miss for a loaded session and mark it as recently used"""
+        with self._lock:
+            if was_cached:
+                self.hits += 1
+            else:
+                self.misses += 1
+        path = self.session_dir(session)
+        if path.is_dir():
+            os.utime(path)
+        if not was_cached:
+            self.enforce_limit()
+
+    def _entries(self):
+        # (mtime, size, year, path) for every cached session directory
+        entries = []
+        for year_dir in self.cache_dir.iterdir() if self.cache_dir.is_dir() else []:
+            if not (year_dir.is_dir() and year_dir.name.isdigit()):
+                continue
+            for event_dir in year_dir.iterdir():
+                if not event_dir.is_dir():
+                    continue
+                for session_dir in event_dir.iterdir():
+                    if not session_dir.is_dir():
+                        continue
+                    size = sum(f.stat().st_size for f in session_dir.rglob('*') if f.is_file())
+                    entries.append((session_dir.stat().st_mtime, size, int(year_dir.name), session_dir))
+        return entries
+
+    def _http_cache_size(self):
+        path = self.cache_dir / HTTP_CACHE_FILE
+        return path.stat().st_size if path.is_file() else 0
+
+    def prune_http_cache(self):
+        """Delete expired raw responses once FastF1's HTTP cache outgrows its budget"""
+        # Offline-first serves expired responses when nothing newer is cached, so keep them there
+        if self.offline_first or self._http_cache_size() <= self.http_max_bytes:
+            return False
+        import fastf1
+        session = fastf1.Cache._requests_session_cached
+        if session is None:
+            return False
+        session.cache.delete(expired=True)
+        if self._http_cache_size() > self.http_max_bytes:
+            print(f"HTTP cache is over its {self.http_max_bytes // (1024 * 1024)} MB budget with no expired responses left")
+        return True
+
+    def is_pinned(self, year):
+        return self.pin_finished and year < datetime.now().year
+
+    def enforce_limit(self):
+        """Evict least recently used, unpinned sessions until the session cache fits its budget"""
+        with self._lock:
+            self.prune_http_cache()
+            entries = self._entries()
+            total = sum(e[1] for e in entries)
+            if total <= self.max_bytes:
+                return 0
+
+            evicted = 0
+            for _, size, year, path in sorted(entries, key=lambda e: e[0]):
+                if total <= self.max_bytes:
+                    break
+                if self.is_pinned(year):
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                evicted += 1
+                for callback in self.on_evict:
+                    callback(year, path)
+
+            if total > self.max_bytes:
+                print(f"Cache is over its {self.max_bytes // (1024 * 1024)} MB budget, only pinned sessions left")
+            self.evictions += evicted
+            return evicted
+
+    def stats(self):
+        """Get size, entry count, hit rate and oldest entry of the disk cache"""
+        entries = self._entries()
+        oldest = min(entries, key=lambda e: e[0]) if entries else None
+        total = self.hits + self.misses
+        return {
+            'path': str(self.cache_dir),
+            'size_mb': round(sum(e[1] for e in entries) / (1024 * 1024), 2),
+            'max_mb': round(self.max_bytes / (1024 * 1024), 2),
+            'http_cache_mb': round(self._http_cache_size() / (1024 * 1024), 2),
+            'http_cache_max_mb': round(self.http_max_bytes / (1024 * 1024), 2),
+            'entries': len(entries),
+            'pinned_entries': sum(1 for e in entries if self.is_pinned(e[2])),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'evictions': self.evictions,
+            'oldest_entry': str(oldest[3].relative_to(self.cache_dir)) if oldest else None,
+            'oldest_access': datetime.fromtimestamp(oldest[0]).isoformat() if oldest else None
+        }
+
+
+CACHE_MANAGER = CacheManager()
+
+def enable_cache():
+    """Enable the FastF1 disk cache, printing (not raising) on failure like before"""
+    try:
+        CACHE_MANAGER.enable()
+    except Exception as e:
+        print(f"Error setting up cache: {str(e)}")
+
+def load_fastf1():
+    """Import FastF1 with the disk cache enabled, on first use instead of at app start"""
+    enable_cache()
+    import fastf1
+    return fastf1
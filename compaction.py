@@ -0,0 +1,91 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Per-browser-session budget for fetched section tables
+USER_MEMORY_MB = float(os.environ.get("F1RDF_USER_MEMORY_MB", 256))
+
+def _narrow_integers(column):
+    # Integral floats (positions, grid slots, whole points) and wide ints shrink to the smallest int type
+    if pd.api.types.is_integer_dtype(column) and not isinstance(column.dtype, pd.api.extensions.ExtensionDtype):
+        return pd.to_numeric(column, downcast='integer')
+    if not pd.api.types.is_float_dtype(column):
+        return column
+    values = column.dropna()
+    if values.empty or not (values == values.round()).all():
+        return column
+    if len(values) == len(column):
+        return pd.to_numeric(column.astype('int64'), downcast='integer')
+    # Missing positions (DNF, DNS) need a nullable type
+    narrowed = pd.to_numeric(values.astype('int64'), downcast='integer')
+    return column.astype(narrowed.dtype.name.capitalize())
+
+def _column_arrays(values):
+    # numpy arrays holding a block's values: the array itself, or the buffers of an
+    # extension array (categorical codes, timedeltas, nullable integers and their mask)
+    if isinstance(values, np.ndarray):
+        return [values]
+    return [getattr(values, name) for name in ('_ndarray', '_data', '_mask')
+            if isinstance(getattr(values, name, None), np.ndarray)]
+
+def freeze_frame(data):
+    """Make the arrays of a table read-only, so in-place edits raise instead of changing shared data"""
+    for block in data._mgr.blocks:
+        for array in _column_arrays(block.values):
+            array.flags.writeable = False
+    return data
+
+def compact_frame(data):
+    """Get a smaller, read-only copy of a section table with identical values
+
+    All-empty columns are dropped, text becomes categorical where that is
+    smaller and integral numbers use the narrowest integer type. The result
+    is shared by every user, so its arrays are frozen (copy before modifying).
+    """
+    data = pd.DataFrame(data).dropna(axis=1, how='all')
+    columns = {}
+    for name, column in data.items():
+        if column.dtype == object:
+            # Drivers, teams, statuses and compounds repeat across rows; tiny tables gain nothing
+            if column.map(lambda v: isinstance(v, str)).all():
+                category = column.astype('category')
+                if category.memory_usage(deep=True) < column.memory_usage(deep=True):
+                    columns[name] = category
+        else:
+            narrowed = _narrow_integers(column)
+            if narrowed is not column:
+                columns[name] = narrowed
+    return freeze_frame(data.assign(**columns) if columns else data)
+
+def table_bytes(data):
+    """Get the deep memory use of a section result (0 for non-tables)"""
+    if not isinstance(data, pd.DataFrame):
+        return 0
+    # Like memory_usage(deep=True), whose object count rejects the read-only arrays of shared tables
+    size = int(data.index.memory_usage(deep=True))
+    for _, column in data.items():
+        if column.dtype == object:
+            size += column.array.nbytes + sum(sys.getsizeof(value) for value in column)
+        else:
+            size += int(column.memory_usage(index=False, deep=True))
+    return size
+
+def apply_memory_budget(fetched, budget_mb=USER_MEMORY_MB):
+    """Replace tables that do not fit a user's memory budget with an error message
+
+    Tables are kept in order until the budget is used up, so earlier sections
+    win over later ones.
+    """
+    budget = int(budget_mb * 1024 * 1024)
+    used = 0
+    kept = {}
+    for section, data in fetched.items():
+        size = table_bytes(data)
+        if used + size > budget:
+            kept[section] = (f"Error: {section} needs {size / (1024 * 1024):.1f} MB, more than is left of the "
+                             f"{budget_mb:g} MB memory budget. Fetch fewer sections at once.")
+            continue
+        used += size
+        kept[section] = data
+    return kept
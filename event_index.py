@@ -0,0 +1,162 @@
+"""Persistent index of every championship event since 1950
+
+Build or complete it up front (one schedule request per missing season):
+    python event_index.py --years 1950-2025
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+FIRST_SEASON = 1950
+
+# Schedule columns kept in the index (local session dates carry mixed time zones, so only UTC ones)
+INDEX_COLUMNS = ['RoundNumber', 'EventName', 'OfficialEventName', 'Country', 'Location', 'EventFormat', 'EventDate'] + \
+    [f'Session{i}' for i in range(1, 6)] + [f'Session{i}DateUtc' for i in range(1, 6)]
+
+# Columns matched by search()
+SEARCH_COLUMNS = ['EventName', 'OfficialEventName', 'Country', 'Location']
+
+
+class EventIndex:
+    """Every event of every indexed season in one compact parquet file
+
+    The file is read at startup, and again whenever another process (a bulk
+    export worker, the warmer) has updated it, so switching years needs no
+    schedule fetch. Finished seasons are indexed once; the current season is refreshed
+    from the schedule loader after current_ttl seconds.
+    """
+
+    def __init__(self, path, loader, current_ttl=15 * 60):
+        self.path = Path(path)
+        self.loader = loader
+        self.current_ttl = current_ttl
+        self._lock = threading.Lock()
+        self._year_locks = {}
+        self._events = None
+        # year -> unix time it was last indexed
+        self._updated = {}
+        # mtime of the file the events were read from or written to
+        self._mtime = None
+
+    def _load(self):
+        # Caller holds self._lock
+        mtime = self.path.stat().st_mtime_ns if self.path.exists() else None
+        if self._events is not None and mtime == self._mtime:
+            return
+        if self._events is None:
+            self._events = pd.DataFrame(columns=['Year'] + INDEX_COLUMNS)
+        self._mtime = mtime
+        if mtime is None:
+            return
+        try:
+            table = pq.read_table(self.path)
+        except (OSError, pa.ArrowInvalid) as e:
+            print(f"Error reading event index: {str(e)}")
+            return
+        metadata = table.schema.metadata or {}
+        self._updated = {int(y): t for y, t in json.loads(metadata.get(b'f1rdf_updated', b'{}')).items()}
+        self._events = table.to_pandas()
+
+    def _save(self):
+        # Caller holds self._lock
+        table = pa.Table.from_pandas(self._events, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[b'f1rdf_updated'] = json.dumps(self._updated).encode()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique per writer, since other processes save the same index
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        pq.write_table(table.replace_schema_metadata(metadata), tmp_path, compression='zstd')
+        os.replace(tmp_path, self.path)
+        self._mtime = self.path.stat().st_mtime_ns
+
+    def _is_fresh(self, year):
+        # Caller holds self._lock
+        updated = self._updated.get(year)
+        if updated is None:
+            return False
+        if year < datetime.now().year:
+            # Indexed after the season ended, so it is final
+            return updated >= datetime(year + 1, 1, 1).timestamp()
+        return time.time() - updated < self.current_ttl
+
+    def _index_year(self, year):
+        with self._lock:
+            self._load()
+            if self._is_fresh(year):
+                return
+            year_lock = self._year_locks.setdefault(year, threading.Lock())
+
+        with year_lock:
+            with self._lock:
+                if self._is_fresh(year):
+                    return
+            schedule = self.loader(year)
+            events = pd.DataFrame({column: schedule[column] for column in INDEX_COLUMNS if column in schedule})
+            events.insert(0, 'Year', year)
+            with self._lock:
+                # Keep the seasons other processes indexed in the meantime
+                self._load()
+                others = self._events[self._events['Year'] != year]
+                self._events = pd.concat([others, events], ignore_index=True) if len(others) else events
+                self._events = self._events.sort_values(['Year', 'RoundNumber'], ignore_index=True)
+                self._updated[year] = time.time()
+                try:
+                    self._save()
+                except (OSError, pa.ArrowException) as e:
+                    print(f"Error saving event index: {str(e)}")
+
+    def events(self, year):
+        """Get the events of one season, indexing it first if needed"""
+        year = int(year)
+        self._index_year(year)
+        with self._lock:
+            return self._events[self._events['Year'] == year].reset_index(drop=True)
+
+    def build(self, years):
+        """Index the given seasons, returning the ones that failed"""
+        failed = []
+        for year in years:
+            try:
+                self._index_year(int(year))
+            except Exception as e:
+                failed.append(year)
+                print(f"Error indexing {year}: {str(e)}")
+        return failed
+
+    def indexed_years(self):
+        with self._lock:
+            self._load()
+            return sorted(self._updated)
+
+    def search(self, text):
+        """Find events of every indexed season whose name, country or location contains text"""
+        with self._lock:
+            self._load()
+            events = self._events
+        text = text.strip().lower()
+        if not text:
+            return events.iloc[0:0]
+        matches = pd.Series(False, index=events.index)
+        for column in SEARCH_COLUMNS:
+            matches |= events[column].astype(str).str.lower().str.contains(text, regex=False)
+        return events[matches & (events['RoundNumber'] > 0)].reset_index(drop=True)
+
+def main():
+    from app import EVENT_INDEX
+    from bulk_export import parse_years
+    parser = argparse.ArgumentParser(description="Build the all-seasons event index")
+    parser.add_argument("--years", default=f"{FIRST_SEASON}-{datetime.now().year}", help="Seasons, e.g. 1950-2025")
+    args = parser.parse_args()
+    failed = EVENT_INDEX.build(parse_years(args.years))
+    print(f"Indexed {len(EVENT_INDEX.indexed_years())} seasons into {EVENT_INDEX.path}")
+    raise SystemExit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+import gzip
+import io
+import json
+import threading
+import zipfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# File name of every section in downloads and the ZIP archive
+SECTION_FILES = {
+    "race_results": "race_results.csv",
+    "driver_standings": "driver_standings.csv",
+    "circuit_info": "circuit_info.json",
+    "constructor_results": "constructor_results.csv",
+    "constructor_standings": "constructor_standings.csv",
+    "constructors_data": "constructors_data.csv",
+    "drivers_data": "drivers_data.csv",
+    "lap_times": "lap_times.csv",
+    "pit_stops": "pit_stops.csv",
+    "lap_analysis": "lap_analysis.csv",
+    "stint_summary": "stint_summary.csv",
+    "qualifying_results": "qualifying_results.csv",
+    "races_data": "races_data.csv",
+    "season_data": "season_data.csv",
+    "sprint_results": "sprint_results.csv",
+    "status_data": "status_data.csv"
+}
+
+# Export format -> (file extension, mime type, default duration encoding)
+EXPORT_FORMATS = {
+    "csv": (".csv", "text/csv", "string"),
+    "csv.gz": (".csv.gz", "application/gzip", "string"),
+    "csv.zst": (".csv.zst", "application/zstd", "string"),
+    "parquet": (".parquet", "application/vnd.apache.parquet", "native"),
+    "feather": (".feather", "application/vnd.apache.arrow.file", "native")
+}
+
+# How Timedelta columns are written: "string" (HH:MM:SS.mmm), "ms" (integer milliseconds)
+# or "native" (kept as durations, only for the Arrow-based formats)
+DURATION_ENCODINGS = ("string", "ms", "native")
+
+def convert_to_serializable(obj):
+    """Convert non-serializable objects to serializable format"""
+    if pd.isna(obj):
+        return None
+    elif isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    elif isinstance(obj, dict):
+        return {k: convert_to_serializable(v) for k, v in obj.items()}
+    elif isinstance(obj, (list, tuple)):
+        return [convert_to_serializable(item) for item in obj]
+    else:
+        return obj
+
+def format_durations(values):
+    """Format a Timedelta series as fixed-width HH:MM:SS.mmm strings without per-value formatting
+
+    Digits are computed with integer arithmetic on the whole column and written
+    into a byte matrix, which is then viewed as one string per row. Hours are
+    capped at 99 and missing values become None.
+    """
+    ns = values.to_numpy(dtype='timedelta64[ns]')
+    missing = np.isnat(ns)
+    ns = np.where(missing, 0, ns.view('int64'))
+    negative = ns < 0
+
+    ms = np.abs(ns) // 1_000_000
+    hours, ms = np.divmod(ms, 3_600_000)
+    minutes, ms = np.divmod(ms, 60_000)
+    seconds, ms = np.divmod(ms, 1000)
+    hours = np.minimum(hours, 99)
+
+    chars = np.empty((len(ns), 12), dtype=np.uint8)
+    chars[:, [2, 5]] = ord(':')
+    chars[:, 8] = ord('.')
+    digits = np.stack([hours // 10, hours % 10, minutes // 10, minutes % 10, seconds // 10,
+                       seconds % 10, ms // 100, ms // 10 % 10, ms % 10], axis=1)
+    chars[:, [0, 1, 3, 4, 6, 7, 9, 10, 11]] = digits + ord('0')
+
+    strings = chars.view('S12').ravel().astype(object)
+    if negative.any():
+        strings[negative] = [b'-' + v for v in strings[negative]]
+    formatted = pd.Series(strings, index=values.index).str.decode('ascii')
+    formatted[missing] = None
+    return formatted
+
+def duration_milliseconds(values):
+    """Convert a Timedelta series to nullable integer milliseconds"""
+    ns = values.to_numpy(dtype='timedelta64[ns]')
+    missing = np.isnat(ns)
+    ms = np.where(missing, 0, ns.view('int64')) // 1_000_000
+    return pd.Series(pd.arrays.IntegerArray(ms, missing), index=values.index)
+
+def encode_durations(data, encoding):
+    """Return a copy of data with every Timedelta column encoded for export"""
+    if encoding == "native":
+        return data
+    if encoding not in DURATION_ENCODINGS:
+        raise ValueError(f"Unknown duration encoding: {encoding}")
+
+    columns = [c for c in data.columns if pd.api.types.is_timedelta64_dtype(data[c])]
+    if not columns:
+        return data
+    data = data.copy()
+    for column in columns:
+        data[column] = format_durations(data[column]) if encoding == "string" else duration_milliseconds(data[column])
+    return data
+
+def serialize(data, fmt="csv", duration_encoding=None):
+    """Serialize a section table to bytes in one of EXPORT_FORMATS"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    data = encode_durations(data, duration_encoding or EXPORT_FORMATS[fmt][2])
+
+    if fmt.startswith("csv"):
+        payload = data.to_csv(index=False).encode()
+        if fmt == "csv.gz":
+            return gzip.compress(payload, compresslevel=6)
+        if fmt == "csv.zst":
+            sink = pa.BufferOutputStream()
+            with pa.CompressedOutputStream(sink, "zstd") as stream:
+                stream.write(payload)
+            return sink.getvalue().to_pybytes()
+        return payload
+
+    buffer = io.BytesIO()
+    if fmt == "parquet":
+        data.to_parquet(buffer, index=False)
+    else:
+        data.reset_index(drop=True).to_feather(buffer)
+    return buffer.getvalue()
+
+def section_filename(key, fmt="csv"):
+    """Get the download file name of a section in a given format"""
+    base = SECTION_FILES.get(key, f"{key}.csv").rsplit('.', 1)[0]
+    return base + EXPORT_FORMATS[fmt][0]
+
+def is_exportable(data):
+    """Check whether fetched section data can be downloaded"""
+    return data is not None and not (isinstance(data, str) and data.startswith("Error"))
+
+
+class ExportCache:
+    """Serialized bytes of fetched sections, computed once per fetched object
+
+    Entries hold a reference to the object they were built from, so a re-fetch
+    (a new object under the same key) is detected and re-serialized.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, data, fmt="csv"):
+        """Get (bytes, file name, mime type) for a section, serializing it at most once per format"""
+        with self._lock:
+            entry = self._entries.get((key, fmt))
+            if entry is not None and entry[0] is data:
+                return entry[1]
+
+        if isinstance(data, dict):
+            # Circuit info is a nested record and is always exported as JSON
+            payload = json.dumps(convert_to_serializable(data), indent=2).encode()
+            export = (payload, SECTION_FILES.get(key, f"{key}.json"), "application/json")
+        else:
+            export = (serialize(data, fmt), section_filename(key, fmt), EXPORT_FORMATS[fmt][1])
+
+        with self._lock:
+            self._entries[(key, fmt)] = (data, export)
+        return export
+
+    def build_zip(self, fetched_data, fmt="csv"):
+        """Build the bytes of a ZIP of every exportable section, from the cached per-section payloads"""
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            for key, data in fetched_data.items():
+                if is_exportable(data):
+                    payload, filename, _ = self.get(key, data, fmt)
+                    # Re-deflating gzip/zstd/Parquet/Feather bytes only costs time
+                    compress_type = zipfile.ZIP_DEFLATED if filename.endswith(('.csv', '.json')) else zipfile.ZIP_STORED
+                    zip_file.writestr(filename, payload, compress_type=compress_type)
+        return archive.getvalue()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,112 @@
+import os
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from compaction import compact_frame
+from metrics import measure_fetch, measure_section
+from app import (load_race_results, get_driver_standings, get_circuit_info, get_constructor_results,
+                 get_constructor_standings, get_constructors_data, get_drivers_data, get_lap_times,
+                 get_pit_stops, get_qualifying_results, get_races_data, get_season_data,
+                 get_sprint_results, get_status_data, get_lap_analysis, get_stint_summary,
+                 get_loaded_session, is_historical, SECTION_REQUIREMENTS, RESULT_CACHE)
+
+MAX_WORKERS = int(os.environ.get("F1RDF_FETCH_WORKERS", 4))
+
+# Getter for every section, all called as getter(year, round_number)
+SECTION_FETCHERS = {
+    "race_results": load_race_results,
+    "driver_standings": get_driver_standings,
+    "circuit_info": get_circuit_info,
+    "constructor_results": get_constructor_results,
+    "constructor_standings": get_constructor_standings,
+    "constructors_data": get_constructors_data,
+    "drivers_data": get_drivers_data,
+    "lap_times": get_lap_times,
+    "pit_stops": get_pit_stops,
+    "lap_analysis": get_lap_analysis,
+    "stint_summary": get_stint_summary,
+    "qualifying_results": get_qualifying_results,
+    "races_data": lambda year, round_number: get_races_data(year),
+    "season_data": lambda year, round_number: get_season_data(year),
+    "sprint_results": get_sprint_results,
+    "status_data": get_status_data
+}
+
+def group_sections(sections):
+    """Group sections by the session they read ('R', 'Q', 'S' or 'schedule')"""
+    groups = {}
+    for section in sections:
+        session_type = SECTION_REQUIREMENTS.get(section, ('schedule', set()))[0]
+        groups.setdefault(session_type, []).append(section)
+    return groups
+
+def fetch_section(section, year, round_number, phases=None):
+    """Get one section through the shared result cache, compacted and shared by every user
+
+    phases holds FastF1 timings already spent on the section's behalf (see measure_section).
+    """
+    def _load():
+        data = measure_section(section, SECTION_FETCHERS[section], year, round_number, phases=dict(phases or {}))
+        return compact_frame(data) if isinstance(data, pd.DataFrame) else data
+    return RESULT_CACHE.get((int(year), int(round_number), section), _load)
+
+def fetch_sections(year, round_number, sections, on_done=None, max_workers=MAX_WORKERS):
+    """Fetch sections concurrently, one load per underlying session
+
+    Each session is loaded once with the union of what its sections need, and
+    independent sessions (race, qualifying, sprint, schedule) load in parallel.
+    A failing section is stored as an "Error: ..." string without cancelling
+    the others. A preload's get_session and load time is attributed to every
+    section that waited for it (and also recorded as preload_<type>).
+    on_done(section, completed, total) is called from the calling
+    thread as each section finishes, so it is safe to update Streamlit widgets.
+    Results come from the process-wide result cache when another user already
+    fetched them; they are shared and must not be modified.
+    """
+    sections = list(sections)
+    # Sessions only need loading for sections nobody has fetched yet
+    groups = group_sections([s for s in sections if not RESULT_CACHE.peek((int(year), int(round_number), s))])
+    results = {}
+
+    with measure_fetch(sections), ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # Preloads are queued first, so section tasks waiting on them never starve the pool
+        preloads = {}
+        preload_phases = {}
+        for session_type, group in groups.items():
+            # Old seasons are read from the history database, not from sessions
+            if session_type == 'schedule' or is_historical(year):
+                continue
+            parts = set()
+            for section in group:
+                parts.update(SECTION_REQUIREMENTS[section][1])
+            preload_phases[session_type] = {}
+            preloads[session_type] = pool.submit(measure_section, f"preload_{session_type}", get_loaded_session,
+                                                 year, round_number, session_type, parts,
+                                                 phases=preload_phases[session_type])
+
+        def _fetch(section):
+            session_type = SECTION_REQUIREMENTS.get(section, ('schedule',))[0]
+            preload = preloads.get(session_type)
+            phases = None
+            if preload is not None:
+                try:
+                    preload.result()
+                except Exception:
+                    pass  # The getter retries the load and reports its own error
+                phases = {phase: seconds for phase, seconds in preload_phases[session_type].items()
+                          if phase in ('get_session', 'load')}
+            return fetch_section(section, year, round_number, phases)
+
+        futures = {pool.submit(_fetch, section): section for section in sections}
+        completed = 0
+        for future in as_completed(futures):
+            section = futures[future]
+            try:
+                results[section] = future.result()
+            except Exception as e:
+                results[section] = f"Error: {str(e)}"
+            completed += 1
+            if on_done is not None:
+                on_done(section, completed, len(sections))
+
+    # Keep the caller's section order
+    return {section: results[section] for section in sections}
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+import pandas as pd
+
+# Sessions that ended less than this many days ago may still change (penalties, corrected timing)
+RECENT_DAYS = float(os.environ.get("F1RDF_RECENT_DAYS", 3))
+# Seconds before a recent session is downloaded again
+RECENT_TTL = int(os.environ.get("F1RDF_RECENT_TTL", 10 * 60))
+
+# Schedule session names the app reads, and how long after their start they are over
+SESSION_TYPES = {'Race': 'R', 'Qualifying': 'Q', 'Sprint': 'S'}
+SESSION_DURATIONS = {'R': pd.Timedelta(hours=3), 'Q': pd.Timedelta(hours=1.5), 'S': pd.Timedelta(hours=1.5)}
+
+# Columns whose values identify a change in each fingerprinted Session.load() part
+FINGERPRINT_COLUMNS = {
+    'results': ['DriverNumber', 'Position', 'ClassifiedPosition', 'GridPosition', 'Status', 'Points', 'Time',
+                'Laps', 'Q1', 'Q2', 'Q3'],
+    'laps': ['Driver', 'LapNumber', 'LapTime', 'Sector1Time', 'Sector2Time', 'Sector3Time', 'PitInTime',
+             'PitOutTime', 'Compound', 'Stint', 'TyreLife', 'Position', 'Deleted']
+}
+
+def utc_now():
+    return pd.Timestamp.now(tz='UTC').tz_localize(None)
+
+def session_type_of(year, name):
+    """Get the session type of a schedule session name, or None for sessions the app does not read"""
+    # 2021 sprints were named "Sprint Qualifying"; from 2024 that is Friday's sprint qualifying
+    if name == 'Sprint Qualifying' and int(year) == 2021:
+        return 'S'
+    return SESSION_TYPES.get(name)
+
+def session_window(year, event, session_type):
+    """Get (start, end) of an event's session in UTC, or None if the schedule has no date for it"""
+    for i in range(1, 6):
+        if session_type_of(year, event.get(f'Session{i}')) == session_type:
+            start = event.get(f'Session{i}DateUtc')
+            if start is None or pd.isna(start):
+                return None
+            start = pd.Timestamp(start)
+            return start, start + SESSION_DURATIONS[session_type]
+    return None
+
+def session_status(year, event, session_type, now=None):
+    """Classify a session as 'future', 'recent' (running or just finished) or 'final'"""
+    now = now if now is not None else utc_now()
+    if int(year) < now.year:
+        return 'final'  # Finished seasons never change
+    window = session_window(year, event, session_type) if event is not None else None
+    if window is None:
+        return 'final'
+    start, end = window
+    if now < start:
+        return 'future'
+    if now - end < pd.Timedelta(days=RECENT_DAYS):
+        return 'recent'
+    return 'final'
+
+def fingerprint(data, part):
+    """Get a digest of the columns of a session part that matter for change detection"""
+    columns = [c for c in FINGERPRINT_COLUMNS[part] if c in data.columns]
+    hasher = hashlib.sha1(json.dumps(columns).encode())
+    hasher.update(pd.util.hash_pandas_object(pd.DataFrame(data[columns]), index=False).to_numpy().tobytes())
+    return hasher.hexdigest()
+
+
+class Freshness:
+    """Freshness rules from the schedule plus fingerprints of downloaded session data
+
+    Recent sessions are downloaded again after a short TTL; the fingerprints
+    tell which parts (results, laps) actually changed, so only the tables
+    built from those are invalidated. Records are shared through a JSON file
+    so refreshes done by other processes are seen here.
+    """
+
+    def __init__(self, path, event_loader, recent_ttl=RECENT_TTL):
+        self.path = Path(path)
+        # event_loader(year, round_number) -> schedule row, or None if unknown
+        self.event_loader = event_loader
+        self.recent_ttl = recent_ttl
+        self._lock = threading.Lock()
+        # "year:round:type" -> {'checked_at': unix time, part: digest, ...}
+        self._records = {}
+        self._mtime = None
+
+    def _reload(self):
+        # Caller holds self._lock; picks up records written by refresh processes
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError:
+            return
+        if mtime != self._mtime:
+            try:
+                with open(self.path) as f:
+                    self._records = json.load(f)
+                self._mtime = mtime
+            except (OSError, ValueError):
+                pass
+
+    def _save(self):
+        # Caller holds self._lock
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self._records, f)
+        os.replace(tmp_path, self.path)
+        self._mtime = self.path.stat().st_mtime
+
+    def status(self, year, round_number, session_type):
+        return session_status(year, self.event_loader(int(year), int(round_number)), session_type)
+
+    def needs_refresh(self, year, round_number, session_type):
+        """Check whether a recent session's cached data is older than the TTL"""
+        if self.status(year, round_number, session_type) != 'recent':
+            return False
+        with self._lock:
+            self._reload()
+            record = self._records.get(f"{int(year)}:{int(round_number)}:{session_type}")
+        return record is None or time.time() - record['checked_at'] >= self.recent_ttl
+
+    def digests(self, key):
+        """Get the recorded {part: digest} of a session"""
+        with self._lock:
+            self._reload()
+            record = self._records.get(':'.join(map(str, key)), {})
+        return {part: digest for part, digest in record.items() if part in FINGERPRINT_COLUMNS}
+
+    def has_fingerprints(self, key, parts):
+        digests = self.digests(key)
+        return all(part in digests for part in parts if part in FINGERPRINT_COLUMNS)
+
+    def record(self, key, session, parts, downloaded):
+        """Fingerprint the loaded parts of a session, returning the set of parts that changed"""
+        digests = {}
+        for part in parts:
+            if part in FINGERPRINT_COLUMNS:
+                data = session.results if part == 'results' else session.laps
+                digests[part] = fingerprint(data, part)
+
+        with self._lock:
+            self._reload()
+            record = dict(self._records.get(':'.join(map(str, key)), {'checked_at': 0}))
+            changed = {part for part, digest in digests.items() if record.get(part) != digest}
+            record.update(digests)
+            if downloaded:
+                record['checked_at'] = time.time()
+            self._records[':'.join(map(str, key))] = record
+            try:
+                self._save()
+            except OSError as e:
+                print(f"Error saving freshness records: {str(e)}")
+        return changed
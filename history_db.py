@@ -0,0 +1,319 @@
+"""Local SQLite database of historical results, qualifying and standings from the Ergast API
+
+Seasons are imported in bulk the first time they are requested; to import
+them up front:
+    python history_db.py --years 1950-2017
+"""
+import argparse
+import sqlite3
+import threading
+import time
+from pathlib import Path
+import pandas as pd
+from cache_manager import load_fastf1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seasons (year INTEGER PRIMARY KEY, imported_at REAL);
+CREATE TABLE IF NOT EXISTS races (
+    year INTEGER, round INTEGER, name TEXT, date TEXT, circuit_id TEXT, PRIMARY KEY (year, round)
+);
+CREATE TABLE IF NOT EXISTS results (
+    year INTEGER, round INTEGER, position INTEGER, position_text TEXT, driver_number TEXT, driver_id TEXT,
+    abbreviation TEXT, first_name TEXT, last_name TEXT, team_id TEXT, team_name TEXT, grid INTEGER,
+    laps INTEGER, status TEXT, points REAL, time_ms INTEGER
+);
+CREATE INDEX IF NOT EXISTS results_race ON results (year, round);
+CREATE INDEX IF NOT EXISTS results_driver ON results (driver_id);
+CREATE INDEX IF NOT EXISTS results_team ON results (team_id);
+CREATE TABLE IF NOT EXISTS qualifying (
+    year INTEGER, round INTEGER, position INTEGER, driver_number TEXT, driver_id TEXT, abbreviation TEXT,
+    first_name TEXT, last_name TEXT, team_id TEXT, team_name TEXT, q1_ms INTEGER, q2_ms INTEGER, q3_ms INTEGER
+);
+CREATE INDEX IF NOT EXISTS qualifying_race ON qualifying (year, round);
+CREATE INDEX IF NOT EXISTS qualifying_driver ON qualifying (driver_id);
+CREATE TABLE IF NOT EXISTS standings_rounds (year INTEGER, round INTEGER, PRIMARY KEY (year, round));
+CREATE TABLE IF NOT EXISTS driver_standings (
+    year INTEGER, round INTEGER, position INTEGER, driver_id TEXT, abbreviation TEXT, first_name TEXT,
+    last_name TEXT, team_name TEXT, points REAL, wins INTEGER
+);
+CREATE INDEX IF NOT EXISTS driver_standings_race ON driver_standings (year, round);
+CREATE INDEX IF NOT EXISTS driver_standings_driver ON driver_standings (driver_id);
+CREATE TABLE IF NOT EXISTS constructor_standings (
+    year INTEGER, round INTEGER, position INTEGER, team_id TEXT, team_name TEXT, points REAL, wins INTEGER
+);
+CREATE INDEX IF NOT EXISTS constructor_standings_race ON constructor_standings (year, round);
+CREATE INDEX IF NOT EXISTS constructor_standings_team ON constructor_standings (team_id);
+"""
+# Bumped when stored rows change meaning; seasons imported under an older version are imported again
+SCHEMA_VERSION = 1
+
+def _milliseconds(values):
+    # Ergast durations as integer milliseconds (None when missing) for storage
+    values = pd.to_timedelta(values)
+    return [None if pd.isna(v) else int(v.total_seconds() * 1000) for v in values]
+
+def _column(content, name):
+    return content[name] if name in content else pd.Series([None] * len(content), index=content.index)
+
+def _driver_columns(content):
+    # Driver identity columns shared by results, qualifying and standings
+    return {
+        'driver_id': content['driverId'],
+        'abbreviation': _column(content, 'driverCode'),
+        'first_name': content['givenName'],
+        'last_name': content['familyName']
+    }
+
+
+class HistoryDB:
+    """Results-only data of past seasons in an indexed SQLite file
+
+    Serves seasons without FastF1 timing data in milliseconds instead of
+    loading a session per request, and makes queries across seasons (a
+    driver's career) a single indexed lookup.
+    """
+
+    def __init__(self, path, enabled=True):
+        self.path = Path(path)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._year_locks = {}
+        self._ergast = None
+        self._initialized = False
+
+    def _connect(self):
+        if not self._initialized:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    connection.execute("PRAGMA journal_mode=WAL")
+                    connection.executescript(SCHEMA)
+                    if connection.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                        # Version 0 stored gaps to the winner as race times
+                        with connection:
+                            connection.execute("DELETE FROM seasons")
+                        connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                    self._initialized = True
+        return connection
+
+    def _query(self, sql, params=()):
+        connection = self._connect()
+        try:
+            return pd.read_sql_query(sql, connection, params=params)
+        finally:
+            connection.close()
+
+    def _fetch(self, method, **filters):
+        # Every page of an Ergast query as one frame, with season and round of each row
+        if self._ergast is None:
+            load_fastf1()  # Ergast responses go through FastF1's HTTP cache
+            from fastf1.ergast import Ergast
+            self._ergast = Ergast(result_type='pandas', auto_cast=True, limit=100)
+        response = getattr(self._ergast, method)(**filters)
+        frames = []
+        while True:
+            if hasattr(response, 'content'):
+                for i, content in enumerate(response.content):
+                    description = response.description.iloc[i]
+                    frames.append(content.assign(season=int(description['season']), round=int(description['round'])))
+            else:
+                # Simple responses (the schedule) already carry season and round columns
+                frames.append(pd.DataFrame(response))
+            if response.is_complete:
+                break
+            response = response.get_next_result_page()
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def _year_lock(self, year):
+        with self._lock:
+            return self._year_locks.setdefault(year, threading.Lock())
+
+    def _has_row(self, sql, params):
+        connection = self._connect()
+        try:
+            return connection.execute(sql, params).fetchone() is not None
+        finally:
+            connection.close()
+
+    def import_season(self, year):
+        """Download a season's races, results and qualifying and store them in one transaction"""
+        year = int(year)
+        schedule = self._fetch('get_race_schedule', season=year)
+        results = self._fetch('get_race_results', season=year)
+        qualifying = self._fetch('get_qualifying_results', season=year)
+
+        races = pd.DataFrame({
+            'year': year,
+            'round': schedule['round'],
+            'name': schedule['raceName'],
+            'date': schedule['raceDate'].astype(str),
+            'circuit_id': schedule['circuitId']
+        }) if len(schedule) else pd.DataFrame(columns=['year', 'round', 'name', 'date', 'circuit_id'])
+        if len(results):
+            results = pd.DataFrame({
+                'year': year, 'round': results['round'], 'position': results['position'],
+                'position_text': results['positionText'], 'driver_number': results['number'].astype(str),
+                **_driver_columns(results), 'team_id': results['constructorId'],
+                'team_name': results['constructorName'], 'grid': results['grid'], 'laps': results['laps'],
+                'status': results['status'], 'points': results['points'],
+                # totalRaceTime is the gap to the winner for everyone else; the millis are absolute
+                'time_ms': _milliseconds(pd.to_timedelta(_column(results, 'totalRaceTimeMillis'), unit='ms'))
+            })
+        if len(qualifying):
+            qualifying = pd.DataFrame({
+                'year': year, 'round': qualifying['round'], 'position': qualifying['position'],
+                'driver_number': qualifying['number'].astype(str), **_driver_columns(qualifying),
+                'team_id': qualifying['constructorId'], 'team_name': qualifying['constructorName'],
+                **{f'q{i}_ms': _milliseconds(_column(qualifying, f'Q{i}')) for i in (1, 2, 3)}
+            })
+
+        connection = self._connect()
+        try:
+            with connection:
+                for table in ('races', 'results', 'qualifying'):
+                    connection.execute(f"DELETE FROM {table} WHERE year = ?", (year,))
+                for table, data in (('races', races), ('results', results), ('qualifying', qualifying)):
+                    if len(data):
+                        data.to_sql(table, connection, if_exists='append', index=False)
+                connection.execute("INSERT OR REPLACE INTO seasons VALUES (?, ?)", (year, time.time()))
+        finally:
+            connection.close()
+
+    def ensure_season(self, year):
+        """Import a season unless it is already in the database"""
+        year = int(year)
+        sql = "SELECT 1 FROM seasons WHERE year = ?"
+        if self._has_row(sql, (year,)):
+            return
+        with self._year_lock(year):
+            if not self._has_row(sql, (year,)):
+                self.import_season(year)
+
+    def _ensure_standings(self, year, round_number):
+        # Standings after a round come from Ergast (they apply dropped scores and shared drives)
+        sql = "SELECT 1 FROM standings_rounds WHERE year = ? AND round = ?"
+        if self._has_row(sql, (year, round_number)):
+            return
+        with self._year_lock(year):
+            if self._has_row(sql, (year, round_number)):
+                return
+            drivers = self._fetch('get_driver_standings', season=year, round=round_number)
+            constructors = self._fetch('get_constructor_standings', season=year, round=round_number)
+            if len(drivers):
+                drivers = pd.DataFrame({
+                    'year': year, 'round': round_number, 'position': drivers['position'], **_driver_columns(drivers),
+                    'team_name': drivers['constructorNames'].map(lambda names: names[-1] if len(names) else None),
+                    'points': drivers['points'], 'wins': drivers['wins']
+                })
+            if len(constructors):
+                constructors = pd.DataFrame({
+                    'year': year, 'round': round_number, 'position': constructors['position'],
+                    'team_id': constructors['constructorId'], 'team_name': constructors['constructorName'],
+                    'points': constructors['points'], 'wins': constructors['wins']
+                })
+            connection = self._connect()
+            try:
+                with connection:
+                    for table, data in (('driver_standings', drivers), ('constructor_standings', constructors)):
+                        if len(data):
+                            data.to_sql(table, connection, if_exists='append', index=False)
+                    connection.execute("INSERT INTO standings_rounds VALUES (?, ?)", (year, round_number))
+            finally:
+                connection.close()
+
+    def race_results(self, year, round_number):
+        """Get race results in FastF1's results layout, or None if the round has none"""
+        self.ensure_season(year)
+        rows = self._query("SELECT * FROM results WHERE year = ? AND round = ? ORDER BY position",
+                           (int(year), int(round_number)))
+        if rows.empty:
+            return None
+        total = pd.to_timedelta(rows['time_ms'], unit='ms')
+        return pd.DataFrame({
+            'DriverNumber': rows['driver_number'],
+            'Abbreviation': rows['abbreviation'],
+            'DriverId': rows['driver_id'],
+            'TeamName': rows['team_name'],
+            'TeamId': rows['team_id'],
+            'FirstName': rows['first_name'],
+            'LastName': rows['last_name'],
+            'FullName': rows['first_name'] + ' ' + rows['last_name'],
+            'Position': rows['position'].astype(float),
+            'ClassifiedPosition': rows['position_text'],
+            'GridPosition': rows['grid'].astype(float),
+            # Like FastF1: the winner's total race time, then gaps to the winner
+            'Time': total.where(rows.index == 0, total - total.iloc[0]),
+            'Status': rows['status'],
+            'Points': rows['points'],
+            'Laps': rows['laps'].astype(float)
+        })
+
+    def qualifying_results(self, year, round_number):
+        """Get qualifying results in FastF1's results layout, or None if the round has none"""
+        self.ensure_season(year)
+        rows = self._query("SELECT * FROM qualifying WHERE year = ? AND round = ? ORDER BY position",
+                           (int(year), int(round_number)))
+        if rows.empty:
+            return None
+        return pd.DataFrame({
+            'DriverNumber': rows['driver_number'],
+            'Abbreviation': rows['abbreviation'],
+            'DriverId': rows['driver_id'],
+            'FullName': rows['first_name'] + ' ' + rows['last_name'],
+            'TeamName': rows['team_name'],
+            **{f'Q{i}': pd.to_timedelta(rows[f'q{i}_ms'], unit='ms') for i in (1, 2, 3)},
+            'Position': rows['position'].astype(float)
+        })
+
+    def driver_standings(self, year, round_number):
+        """Get the official drivers' championship after a round, or None before it existed"""
+        self._ensure_standings(int(year), int(round_number))
+        rows = self._query("""SELECT driver_id AS "Driver ID", abbreviation AS "Abbreviation",
+                                     first_name || ' ' || last_name AS "Full Name", team_name AS "Team",
+                                     points AS "Points", position AS "Position", wins AS "Wins"
+                              FROM driver_standings WHERE year = ? AND round = ? ORDER BY position""",
+                           (int(year), int(round_number)))
+        return None if rows.empty else rows
+
+    def constructor_standings(self, year, round_number):
+        """Get the official constructors' championship after a round (awarded from 1958), or None"""
+        self._ensure_standings(int(year), int(round_number))
+        rows = self._query("""SELECT position AS "Position", team_name AS "Team", points AS "Points",
+                                     wins AS "Wins"
+                              FROM constructor_standings WHERE year = ? AND round = ? ORDER BY position""",
+                           (int(year), int(round_number)))
+        return None if rows.empty else rows
+
+    def driver_career(self, driver_id):
+        """Get starts, wins, podiums and points per season of one driver across imported seasons"""
+        return self._query("""SELECT year AS "Year", COUNT(*) AS "Starts", SUM(position = 1) AS "Wins",
+                                     SUM(position <= 3) AS "Podiums", SUM(points) AS "Points",
+                                     MIN(team_name) AS "Team"
+                              FROM results WHERE driver_id = ? GROUP BY year ORDER BY year""",
+                           (driver_id,))
+
+def main():
+    from app import HISTORY_DB
+    from bulk_export import parse_years
+    parser = argparse.ArgumentParser(description="Import historical seasons into the local results database")
+    parser.add_argument("--years", default="1950-2017", help="Seasons to import, e.g. 1950-2017")
+    parser.add_argument("--force", action="store_true", help="Re-import seasons that are already stored")
+    args = parser.parse_args()
+
+    failures = 0
+    for year in parse_years(args.years):
+        try:
+            if args.force:
+                HISTORY_DB.import_season(year)
+            else:
+                HISTORY_DB.ensure_season(year)
+            print(f"Imported {year}")
+        except Exception as e:
+            failures += 1
+            print(f"Error importing {year}: {str(e)}")
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
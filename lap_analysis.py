@@ -0,0 +1,92 @@
+import numpy as np
+
+# Columns identifying one race when several races are analysed in one frame
+RACE_KEYS = ['Year', 'Round']
+
+ROLLING_WINDOW = 5
+
+def _race_keys(laps):
+    return [key for key in RACE_KEYS if key in laps.columns]
+
+def _seconds(values):
+    return values.dt.total_seconds().to_numpy(dtype=float)
+
+def analyze_laps(laps, window=ROLLING_WINDOW):
+    """Compute per-lap pace metrics for every driver at once
+
+    Takes FastF1 lap rows (optionally several races, told apart by Year/Round
+    columns) and returns lap time, rolling pace within the stint, sector and
+    lap deltas to the session best and the gap to the leader, all in seconds.
+    In- and out-laps are excluded from the rolling pace.
+    """
+    races = _race_keys(laps)
+    data = laps[races + ['Driver', 'LapNumber', 'Stint', 'Compound', 'TyreLife', 'Position']].copy()
+    data['LapSeconds'] = _seconds(laps['LapTime'])
+    for sector in (1, 2, 3):
+        data[f'S{sector}Seconds'] = _seconds(laps[f'Sector{sector}Time'])
+    data['TimeSeconds'] = _seconds(laps['Time'])
+    data['PitLap'] = (laps['PitInTime'].notna() | laps['PitOutTime'].notna()).to_numpy()
+    data = data.sort_values(races + ['Driver', 'LapNumber'], kind='stable').reset_index(drop=True)
+
+    # Rolling pace over clean laps of the same stint
+    clean = data['LapSeconds'].where(~data['PitLap'])
+    stint_keys = races + ['Driver', 'Stint']
+    data['RollingPace'] = (
+        clean.groupby([data[k] for k in stint_keys], dropna=False)
+        .rolling(window, min_periods=1).mean()
+        .reset_index(level=list(range(len(stint_keys))), drop=True)
+    )
+
+    # Deltas to the best lap and sectors of each race
+    race_groups = [data[k] for k in races] if races else None
+    for column, delta in (('LapSeconds', 'LapDelta'), ('S1Seconds', 'S1Delta'),
+                          ('S2Seconds', 'S2Delta'), ('S3Seconds', 'S3Delta')):
+        best = data.groupby(race_groups)[column].transform('min') if races else data[column].min()
+        data[delta] = data[column] - best
+
+    # Gap to whoever completed each lap first
+    lap_groups = [data[k] for k in races] + [data['LapNumber']]
+    data['GapToLeader'] = data['TimeSeconds'] - data.groupby(lap_groups)['TimeSeconds'].transform('min')
+
+    result = data[races + ['Driver', 'LapNumber', 'Stint', 'Compound', 'TyreLife', 'Position', 'LapSeconds',
+                           'RollingPace', 'LapDelta', 'S1Delta', 'S2Delta', 'S3Delta', 'GapToLeader']]
+    result.columns = races + ['Driver', 'Lap Number', 'Stint', 'Compound', 'Tyre Life', 'Position', 'Lap Time (s)',
+                              'Rolling Pace (s)', 'Delta to Best Lap (s)', 'Sector 1 Delta (s)',
+                              'Sector 2 Delta (s)', 'Sector 3 Delta (s)', 'Gap to Leader (s)']
+    return result.reset_index(drop=True)
+
+def stint_summary(laps):
+    """Summarise every driver's stints: compound, laps, mean pace and tyre degradation
+
+    Degradation is the least-squares slope of clean lap time against tyre life
+    (seconds per lap), computed from grouped sums rather than one fit per stint.
+    """
+    races = _race_keys(laps)
+    keys = races + ['Driver', 'Stint']
+    pit_lap = (laps['PitInTime'].notna() | laps['PitOutTime'].notna()).to_numpy()
+    y = _seconds(laps['LapTime'])
+    x = laps['TyreLife'].to_numpy(dtype=float)
+    clean = ~pit_lap & ~np.isnan(y) & ~np.isnan(x)
+
+    data = laps[keys + ['Compound', 'LapNumber']].copy()
+    data['n'] = clean.astype(float)
+    data['x'] = np.where(clean, x, 0.0)
+    data['y'] = np.where(clean, y, 0.0)
+    data['xy'] = data['x'] * data['y']
+    data['xx'] = data['x'] * data['x']
+
+    grouped = data.groupby(keys, dropna=False)
+    sums = grouped[['n', 'x', 'y', 'xy', 'xx']].sum()
+    summary = grouped.agg(Compound=('Compound', 'first'), StartLap=('LapNumber', 'min'),
+                          EndLap=('LapNumber', 'max'), Laps=('LapNumber', 'size'))
+
+    n = sums['n'].to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        summary['MeanPace'] = np.where(n > 0, sums['y'] / n, np.nan)
+        denominator = n * sums['xx'] - sums['x'] ** 2
+        summary['Degradation'] = np.where((n > 1) & (denominator != 0),
+                                          (n * sums['xy'] - sums['x'] * sums['y']) / denominator, np.nan)
+
+    summary = summary.reset_index()
+    summary.columns = keys + ['Compound', 'Start Lap', 'End Lap', 'Laps', 'Mean Pace (s)', 'Degradation (s/lap)']
+    return summary
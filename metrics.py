@@ -0,0 +1,207 @@
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger("f1rdf.metrics")
+
+# Histogram buckets (seconds) for the per-section latency SLOs
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+METRICS_FILE = os.environ.get("F1RDF_METRICS_FILE")
+TRACE_MEMORY = os.environ.get("F1RDF_TRACE_MEMORY") == "1"
+
+# Phase durations of the section currently being fetched on this thread
+_current_section = contextvars.ContextVar("f1rdf_current_section", default=None)
+
+
+class Metrics:
+    """Process-wide latency histograms, counters and recent per-section fetch records"""
+
+    def __init__(self, recent=200):
+        self._lock = threading.Lock()
+        # (section, phase) -> [bucket counts..., count, sum]
+        self._histograms = {}
+        # (name, labels tuple) -> value
+        self._counters = {}
+        self._gauges = {}
+        # name -> callable returning {metric name: value}, read at export time
+        self._collectors = {}
+        self.recent = deque(maxlen=recent)
+
+    def observe(self, section, phase, seconds):
+        with self._lock:
+            histogram = self._histograms.setdefault((section, phase), [0] * len(LATENCY_BUCKETS) + [0, 0.0])
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    histogram[i] += 1
+            histogram[-2] += 1
+            histogram[-1] += seconds
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def register_collector(self, name, collector):
+        """Register a callable whose {metric: value} result is exported as gauges"""
+        self._collectors[name] = collector
+
+    def render_prometheus(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = ["# TYPE f1rdf_section_phase_seconds histogram"]
+        with self._lock:
+            for (section, phase), histogram in sorted(self._histograms.items()):
+                labels = f'section="{section}",phase="{phase}"'
+                for bound, count in zip(LATENCY_BUCKETS, histogram):
+                    lines.append(f'f1rdf_section_phase_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'f1rdf_section_phase_seconds_bucket{{{labels},le="+Inf"}} {histogram[-2]}')
+                lines.append(f'f1rdf_section_phase_seconds_count{{{labels}}} {histogram[-2]}')
+                lines.append(f'f1rdf_section_phase_seconds_sum{{{labels}}} {histogram[-1]:.6f}')
+            for kind, values in (("counter", self._counters), ("gauge", self._gauges)):
+                for name in sorted({name for name, _ in values}):
+                    lines.append(f"# TYPE {name} {kind}")
+                    for (metric, labels), value in sorted(values.items()):
+                        if metric == name:
+                            label_text = ','.join(f'{k}="{v}"' for k, v in labels)
+                            lines.append(f"{name}{{{label_text}}} {value}" if labels else f"{name} {value}")
+
+        for source, collector in sorted(self._collectors.items()):
+            try:
+                values = collector()
+            except Exception as e:
+                logger.warning("metrics collector %s failed: %s", source, e)
+                continue
+            for name, value in sorted(values.items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f"# TYPE f1rdf_{source}_{name} gauge")
+                    lines.append(f"f1rdf_{source}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path=METRICS_FILE):
+        """Write the metrics text file atomically (for node_exporter's textfile collector)"""
+        if not path:
+            return
+        path = Path(path)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+
+METRICS = Metrics()
+
+@contextlib.contextmanager
+def timed(phase):
+    """Time a phase (get_session, load) of the section being fetched on this thread"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        phases = _current_section.get()
+        if phases is not None:
+            phases[phase] = phases.get(phase, 0.0) + elapsed
+        else:
+            METRICS.observe("none", phase, elapsed)
+
+def _current_rss():
+    # Resident set size of this process right now (Linux), or None where /proc is unavailable
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _table_size(data):
+    # (rows, bytes) of a section result; bytes include object column contents
+    if hasattr(data, 'memory_usage'):
+        return len(data), int(data.memory_usage(deep=True).sum())
+    return 0, 0
+
+def measure_section(section, getter, *args, phases=None):
+    """Call a section getter, recording phase timings, rows and bytes
+
+    Projection time is the getter's total time minus the FastF1 phases it
+    triggered, so a section served from cache shows up as pure projection.
+    phases, if given, is filled with the recorded timings; values already in
+    it (a session preload done on the section's behalf) count towards the
+    section's phases and total.
+    """
+    phases = phases if phases is not None else {}
+    spent = sum(phases.values())
+    token = _current_section.set(phases)
+    start = time.perf_counter()
+    status = "ok"
+    data = None
+    try:
+        data = getter(*args)
+        if isinstance(data, str) and data.startswith("Error"):
+            status = "error"
+        return data
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        total = time.perf_counter() - start + spent
+        _current_section.reset(token)
+        phases['projection'] = max(total - phases.get('get_session', 0.0) - phases.get('load', 0.0), 0.0)
+        phases['total'] = total
+        for phase, seconds in phases.items():
+            METRICS.observe(section, phase, seconds)
+        rows, size = _table_size(data)
+        METRICS.inc("f1rdf_section_fetches_total", section=section, status=status)
+        METRICS.set("f1rdf_section_rows", rows, section=section)
+        METRICS.set("f1rdf_section_bytes", size, section=section)
+        record = {'section': section, 'status': status, 'rows': rows, 'bytes': size,
+                  **{f"{phase}_s": round(seconds, 4) for phase, seconds in phases.items()}}
+        METRICS.recent.append(record)
+        logger.info(json.dumps({'event': 'section_fetch', **record}))
+
+@contextlib.contextmanager
+def measure_fetch(sections):
+    """Measure wall time and memory of one multi-section fetch
+
+    With F1RDF_TRACE_MEMORY=1 the fetch's own peak comes from tracemalloc
+    (accurate but slows allocation-heavy code). Otherwise the change in
+    resident memory across the fetch is reported, which includes concurrent
+    fetches of other users, plus the process-wide peak RSS as a separate gauge.
+    """
+    if TRACE_MEMORY and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    rss_before = _current_rss()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        memory = {}
+        if tracemalloc.is_tracing():
+            memory['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+            METRICS.set("f1rdf_fetch_peak_memory_bytes", memory['peak_memory_bytes'])
+        rss_after = _current_rss()
+        if rss_before is not None and rss_after is not None:
+            memory['rss_delta_bytes'] = rss_after - rss_before
+            METRICS.set("f1rdf_fetch_rss_delta_bytes", memory['rss_delta_bytes'])
+        if resource is not None:
+            # ru_maxrss is in KiB on Linux; it is the process's high-water mark, not this fetch's
+            METRICS.set("f1rdf_process_peak_rss_bytes", resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+        METRICS.observe("fetch", "total", elapsed)
+        logger.info(json.dumps({'event': 'fetch', 'sections': list(sections), 'total_s': round(elapsed, 4), **memory}))
+        METRICS.write_prometheus()
@@ -0,0 +1,55 @@
+from season_index import SeasonIndex
+
+# Columns identifying one race when several races are paired in one frame
+RACE_KEYS = ['Year', 'Round']
+
+PIT_STOP_COLUMNS = ['Driver', 'Team', 'Stop', 'Lap', 'Pit In Time', 'Pit Out Time', 'Pit Lane Time',
+                    'Compound Before', 'Compound After']
+
+def pair_pit_stops(laps):
+    """Pair every in-lap with the driver's following out-lap to build one row per stop
+
+    FastF1 puts PitInTime on the in-lap and PitOutTime on the next lap, so the
+    stop is found by shifting each driver's laps by one. Out-laps without an
+    in-lap (the race start, pit lane starts) are not stops. The pit lane time
+    runs from pit entry to pit exit; FastF1 timing does not include the
+    stationary time, so it is not reported. Retirements in the pit lane keep a
+    missing Pit Out Time.
+    """
+    races = [key for key in RACE_KEYS if key in laps.columns]
+    driver_keys = races + ['Driver']
+    data = laps[driver_keys + ['Team', 'LapNumber', 'PitInTime', 'PitOutTime', 'Compound']]
+    data = data.sort_values(driver_keys + ['LapNumber'], kind='stable').reset_index(drop=True)
+
+    following = data.groupby(driver_keys, sort=False)[['LapNumber', 'PitOutTime', 'Compound']].shift(-1)
+    is_stop = data['PitInTime'].notna().to_numpy()
+    # Only the immediately following lap can be the out-lap of this stop
+    pit_out = following['PitOutTime'].where(following['LapNumber'] == data['LapNumber'] + 1)
+
+    stops = data.loc[is_stop, driver_keys + ['Team', 'LapNumber', 'PitInTime', 'Compound']].copy()
+    stops['PitOutTime'] = pit_out[is_stop]
+    stops['PitLaneTime'] = stops['PitOutTime'] - stops['PitInTime']
+    stops['CompoundAfter'] = following.loc[is_stop, 'Compound']
+    stops.insert(len(driver_keys) + 1, 'Stop', stops.groupby(driver_keys, sort=False).cumcount() + 1)
+
+    stops = stops[driver_keys + ['Team', 'Stop', 'LapNumber', 'PitInTime', 'PitOutTime', 'PitLaneTime',
+                                 'Compound', 'CompoundAfter']]
+    stops.columns = races + PIT_STOP_COLUMNS
+    return stops.reset_index(drop=True)
+
+def fastest_stops(stops, by='Team'):
+    """Get the fastest stop per team or driver from a (season) pit stop table"""
+    timed = stops.dropna(subset=['Pit Lane Time'])
+    if timed.empty:
+        return timed
+    fastest = timed.loc[timed.groupby(by)['Pit Lane Time'].idxmin()]
+    return fastest.sort_values('Pit Lane Time').reset_index(drop=True)
+
+
+class PitStopIndex(SeasonIndex):
+    """Per-season index of paired pit stops of every race
+
+    loader(year, round_number, session_type) returns the race's pair_pit_stops() table.
+    """
+
+    columns = ['Round', 'Session'] + PIT_STOP_COLUMNS
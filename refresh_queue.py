@@ -0,0 +1,76 @@
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+REFRESH_WORKERS = int(os.environ.get("F1RDF_REFRESH_WORKERS", 1))
+
+def _start_online():
+    # Refresh processes download, so they must not inherit offline-first mode
+    os.environ["F1RDF_OFFLINE_FIRST"] = "0"
+
+def _refresh_session(year, round_number, session_type, parts):
+    from app import refresh_session
+    return refresh_session(year, round_number, session_type, parts)
+
+
+class RefreshQueue:
+    """Background downloads of sessions missing from the disk cache or due for a refresh
+
+    FastF1's offline mode is process-wide, so refreshes run in separate worker
+    processes while the serving process stays offline. A session is queued at
+    most once until its refresh finishes.
+    """
+
+    def __init__(self, workers=REFRESH_WORKERS):
+        self.workers = workers
+        self.completed = 0
+        self.failed = 0
+        # Called with (key, parts that changed) in this process after each successful refresh
+        self.on_done = []
+        self._queue = queue.Queue()
+        # key -> parts of every refresh queued or running
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pool = None
+
+    def submit(self, year, round_number, session_type, parts):
+        """Queue a refresh, returning False if that session is already queued"""
+        key = (int(year), int(round_number), session_type)
+        with self._lock:
+            if key in self._pending:
+                self._pending[key] |= set(parts)
+                return False
+            self._pending[key] = set(parts)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="f1rdf-refresh", daemon=True)
+                self._thread.start()
+        self._queue.put(key)
+        return True
+
+    def _run(self):
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                         initializer=_start_online)
+        while True:
+            key = self._queue.get()
+            with self._lock:
+                parts = sorted(self._pending[key])
+            try:
+                changed = self._pool.submit(_refresh_session, *key, parts).result()
+                self.completed += 1
+                for callback in self.on_done:
+                    callback(key, changed)
+            except Exception as e:
+                self.failed += 1
+                print(f"Error refreshing {key[0]} round {key[1]} {key[2]}: {str(e)}")
+            finally:
+                with self._lock:
+                    del self._pending[key]
+
+    def stats(self):
+        """Get the number of queued, completed and failed refreshes"""
+        with self._lock:
+            pending = len(self._pending)
+        return {'pending': pending, 'completed': self.completed, 'failed': self.failed}
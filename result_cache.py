@@ -0,0 +1,138 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class ResultCache:
+    """Process-wide cache of section results keyed by (year, round, section), shared by every user
+
+    Cached frames are handed out as-is to every caller; the fetcher freezes
+    their arrays (see compaction.freeze_frame), so copy before modifying.
+    Concurrent requests for the same key
+    wait on a single in-flight load. Entries evicted from the LRU stay
+    reachable through weak references while some user still holds them, so a
+    frame that is in use is never loaded a second time.
+    """
+
+    def __init__(self, max_entries=256, ttl=900):
+        self.max_entries = max_entries
+        # Seconds a result is served before it is built again; 0 disables expiry
+        self.ttl = ttl
+        # key -> (value, expiry time)
+        self._entries = OrderedDict()
+        self._weak = weakref.WeakValueDictionary()
+        self._weak_expiry = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _lookup(self, key, now):
+        # Caller holds self._lock
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[1] > now:
+                self._entries.move_to_end(key)
+                return entry[0]
+            del self._entries[key]
+
+        value = self._weak.get(key)
+        if value is not None and self._weak_expiry.get(key, 0) > now:
+            # Still referenced by a user after eviction: promote it back into the LRU
+            self._store(key, value, self._weak_expiry[key])
+            return value
+        self._weak_expiry.pop(key, None)
+        return None
+
+    def _store(self, key, value, expiry):
+        # Caller holds self._lock
+        self._entries[key] = (value, expiry)
+        self._entries.move_to_end(key)
+        try:
+            self._weak[key] = value
+            self._weak_expiry[key] = expiry
+        except TypeError:
+            pass  # dicts and other plain values cannot be weakly referenced
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+            # Forget expiry times of evicted results nobody references any more
+            for stale in [k for k in self._weak_expiry if k not in self._weak]:
+                del self._weak_expiry[stale]
+
+    def get(self, key, loader):
+        """Get the result for key, calling loader() once however many threads ask at the same time
+
+        None and "Error: ..." strings are returned to every waiting caller but
+        never cached.
+        """
+        with self._lock:
+            value = self._lookup(key, time.monotonic())
+            if value is not None:
+                self.hits += 1
+                return value
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                self.misses += 1
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            if value is not None and not isinstance(value, str):
+                self._store(key, value, time.monotonic() + self.ttl if self.ttl else float('inf'))
+            del self._inflight[key]
+        future.set_result(value)
+        return value
+
+    def peek(self, key):
+        """Check whether a result is cached, without loading or counting a hit"""
+        with self._lock:
+            return self._lookup(key, time.monotonic()) is not None
+
+    def invalidate(self, keys=None):
+        """Drop the given keys, or everything when keys is None"""
+        with self._lock:
+            if keys is None:
+                self._entries.clear()
+                self._weak_expiry.clear()
+                return
+            for key in keys:
+                self._entries.pop(key, None)
+                self._weak_expiry.pop(key, None)
+
+    def invalidate_where(self, predicate):
+        """Drop every key for which predicate(key) is true"""
+        with self._lock:
+            keys = [key for key in set(self._entries) | set(self._weak_expiry) if predicate(key)]
+        self.invalidate(keys)
+
+    def stats(self):
+        """Get hit/miss counters and the number of strong and weakly held results"""
+        with self._lock:
+            total = self.hits + self.misses + self.coalesced
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_entries,
+                'referenced': len(self._weak),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits + self.coalesced) / total if total else 0.0
+            }
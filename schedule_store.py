@@ -0,0 +1,67 @@
+import threading
+import time
+from datetime import datetime
+
+
+class ScheduleStore:
+    """In-process store of event schedules with per-year TTL and lookup indexes
+
+    Past seasons rarely change and are kept for a long time, while the current
+    season is refreshed often so new rounds and date changes show up.
+    """
+
+    def __init__(self, loader, past_ttl=24 * 3600, current_ttl=15 * 60):
+        self.loader = loader
+        self.past_ttl = past_ttl
+        self.current_ttl = current_ttl
+        self._lock = threading.Lock()
+        self._year_locks = {}
+        # year -> (loaded_at, schedule, {round: event})
+        self._years = {}
+
+    def _ttl(self, year):
+        return self.past_ttl if year < datetime.now().year else self.current_ttl
+
+    def _entry(self, year):
+        year = int(year)
+        with self._lock:
+            entry = self._years.get(year)
+            if entry is not None and time.monotonic() - entry[0] < self._ttl(year):
+                return entry
+            year_lock = self._year_locks.setdefault(year, threading.Lock())
+
+        with year_lock:
+            with self._lock:
+                entry = self._years.get(year)
+                if entry is not None and time.monotonic() - entry[0] < self._ttl(year):
+                    return entry
+
+            schedule = self.loader(year)
+            by_round = {}
+            for i in range(len(schedule)):
+                event = schedule.iloc[i]
+                by_round[int(event['RoundNumber'])] = event
+
+            entry = (time.monotonic(), schedule, by_round)
+            with self._lock:
+                self._years[year] = entry
+            return entry
+
+    def get(self, year):
+        """Get the full event schedule for a year"""
+        return self._entry(year)[1]
+
+    def get_event(self, year, round_number):
+        """Get one event of a season by round number"""
+        by_round = self._entry(year)[2]
+        if int(round_number) not in by_round:
+            raise ValueError(f"No round {round_number} in the {year} schedule")
+        return by_round[int(round_number)]
+
+    def invalidate(self, year=None):
+        """Forget one year, or every year when year is None"""
+        with self._lock:
+            if year is None:
+                self._years.clear()
+            else:
+                self._years.pop(int(year), None)
@@ -0,0 +1,149 @@
+import os
+import threading
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from freshness import session_window, utc_now
+
+
+class SeasonIndex:
+    """Persistent per-season table built from one set of rows per (round, session)
+
+    Each (round, session type) is ingested once through loader(year, round,
+    session_type) and stored in <root>/<year>.parquet, so later queries only
+    load the rounds that are not in the index yet. Subclasses choose which
+    sessions of an event to ingest and how to turn a loader result into rows.
+    """
+
+    columns = []
+
+    def __init__(self, root, loader, schedule_loader):
+        self.root = Path(root)
+        self.loader = loader
+        self.schedule_loader = schedule_loader
+        self._lock = threading.Lock()
+        self._year_locks = {}
+        # year -> (index DataFrame, set of ingested (round, session) keys)
+        self._years = {}
+        # year -> mtime of the file the cached index was read from or written to
+        self._mtimes = {}
+        # year -> rounds invalidated while another thread was ingesting (None = whole season)
+        self._pending = {}
+
+    def session_types(self, event):
+        """Session types of an event that contribute rows"""
+        return ['R']
+
+    def rows(self, year, round_number, session_type, data):
+        """Turn a loader result into index rows (None or empty for no rows)"""
+        return data
+
+    def _path(self, year):
+        return self.root / f"{int(year)}.parquet"
+
+    def _year_lock(self, year):
+        with self._lock:
+            return self._year_locks.setdefault(year, threading.RLock())
+
+    def _read(self, year):
+        path = self._path(year)
+        mtime = path.stat().st_mtime_ns if path.exists() else None
+        # Another process (e.g. a bulk export worker) may have updated the file since
+        if year in self._years and self._mtimes.get(year) == mtime:
+            return self._years[year]
+
+        if mtime is not None:
+            table = pq.read_table(path)
+            ingested = (table.schema.metadata or {}).get(b'f1rdf_ingested', b'')
+            keys = {(int(k.split(':')[0]), k.split(':')[1]) for k in ingested.decode().split(',') if k}
+            index = table.to_pandas()
+        else:
+            index, keys = pd.DataFrame(columns=self.columns), set()
+        self._years[year] = (index, keys)
+        self._mtimes[year] = mtime
+        return index, keys
+
+    def _write(self, year, index, keys):
+        self.root.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pandas(index, preserve_index=False)
+        ingested = ','.join(f"{r}:{s}" for r, s in sorted(keys))
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'f1rdf_ingested': ingested.encode()})
+        # Write to a temporary file first so readers in other processes never see a partial file
+        path = self._path(year)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+        self._mtimes[year] = path.stat().st_mtime_ns
+
+    def _sessions_until(self, year, round_number):
+        # (round, session type) pairs of sessions that are over, up to round_number
+        schedule = self.schedule_loader(year)
+        events = schedule[schedule['RoundNumber'] > 0]
+        if round_number is not None:
+            events = events[events['RoundNumber'] <= round_number]
+        now = utc_now()
+        sessions = []
+        for _, event in events.iterrows():
+            for session_type in self.session_types(event):
+                window = session_window(year, event, session_type)
+                # EventDate is midnight on race day, so without session times wait for the day after
+                end = window[1] if window is not None else pd.Timestamp(event['EventDate']) + pd.Timedelta(days=1)
+                if end <= now:
+                    sessions.append((int(event['RoundNumber']), session_type))
+        return sessions
+
+    def get(self, year, round_number=None):
+        """Get the index rows of a season up to round_number (all past rounds if None)"""
+        year = int(year)
+        round_number = None if round_number is None else int(round_number)
+        with self._year_lock(year):
+            self._apply_pending(year)
+            index, keys = self._read(year)
+            missing = [key for key in self._sessions_until(year, round_number) if key not in keys]
+            if missing:
+                frames = [index] if not index.empty else []
+                for round_key, session_type in missing:
+                    rows = self.rows(year, round_key, session_type, self.loader(year, round_key, session_type))
+                    if rows is not None and not rows.empty:
+                        rows = rows.reset_index(drop=True)
+                        rows.insert(0, 'Session', session_type)
+                        rows.insert(0, 'Round', round_key)
+                        frames.append(rows)
+                    keys = keys | {(round_key, session_type)}
+                index = pd.concat(frames, ignore_index=True) if frames else index
+                self._years[year] = (index, keys)
+                self._write(year, index, keys)
+        return index if round_number is None else index[index['Round'] <= round_number]
+
+    def invalidate(self, year, round_number=None):
+        """Forget ingested sessions of one round (or a whole season) so they are re-read"""
+        year = int(year)
+        with self._lock:
+            self._pending.setdefault(year, set()).add(None if round_number is None else int(round_number))
+        # Never wait for another thread's ingest, which may itself be waiting on a lock
+        # the caller holds; that thread applies the invalidation on its next get
+        lock = self._year_lock(year)
+        if lock.acquire(blocking=False):
+            try:
+                self._apply_pending(year)
+            finally:
+                lock.release()
+
+    def _apply_pending(self, year):
+        # Caller holds the year lock
+        with self._lock:
+            rounds = self._pending.pop(year, set())
+        if not rounds:
+            return
+        index, keys = self._read(year)
+        if None not in rounds and not any(key[0] in rounds for key in keys):
+            return  # Nothing of those rounds was ingested
+        if None in rounds:
+            index, keys = index.iloc[0:0], set()
+        else:
+            if 'Round' in index:
+                index = index[~index['Round'].isin(rounds)]
+            keys = {key for key in keys if key[0] not in rounds}
+        self._years[year] = (index, keys)
+        self._write(year, index, keys)
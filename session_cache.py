@@ -0,0 +1,97 @@
+import threading
+from collections import OrderedDict
+
+
+class SessionCache:
+    """Thread-safe LRU cache of loaded FastF1 sessions keyed by (year, round, session type)
+
+    Each entry remembers which parts of the session were loaded (laps, telemetry, ...)
+    so a later request that needs more can upgrade the cached session in place.
+    """
+
+    def __init__(self, max_sessions=8):
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        # One lock per key so two users asking for the same race wait on a single load
+        self._key_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.upgrades = 0
+        self.evictions = 0
+
+    def _key_lock(self, key):
+        with self._lock:
+            if key not in self._key_locks:
+                self._key_locks[key] = threading.Lock()
+            return self._key_locks[key]
+
+    def _lookup(self, key, parts):
+        # Caller holds self._lock
+        entry = self._sessions.get(key)
+        if entry is not None and parts <= entry[1]:
+            self._sessions.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        return None
+
+    def get(self, key, loader, parts=frozenset()):
+        """Return the cached session for key with at least `parts` loaded
+
+        On a miss loader(None, parts) builds a new session; when the cached
+        session lacks some parts loader(session, all_parts) loads the union.
+        """
+        parts = frozenset(parts)
+        with self._lock:
+            session = self._lookup(key, parts)
+            if session is not None:
+                return session
+
+        with self._key_lock(key):
+            # Another thread may have finished loading while we waited
+            with self._lock:
+                session = self._lookup(key, parts)
+                if session is not None:
+                    return session
+                entry = self._sessions.get(key)
+                if entry is None:
+                    self.misses += 1
+                    session, loaded = None, frozenset()
+                else:
+                    self.upgrades += 1
+                    session, loaded = entry
+
+            loaded = loaded | parts
+            session = loader(session, loaded)
+
+            with self._lock:
+                self._sessions[key] = (session, loaded)
+                self._sessions.move_to_end(key)
+                while len(self._sessions) > self.max_sessions:
+                    evicted_key, _ = self._sessions.popitem(last=False)
+                    self._key_locks.pop(evicted_key, None)
+                    self.evictions += 1
+            return session
+
+    def invalidate(self, key=None):
+        """Drop one cached session, or all of them when key is None"""
+        with self._lock:
+            if key is None:
+                self._sessions.clear()
+            else:
+                self._sessions.pop(key, None)
+
+    def stats(self):
+        """Get hit/miss counters and current size"""
+        with self._lock:
+            total = self.hits + self.misses + self.upgrades
+            return {
+                'size': len(self._sessions),
+                'max_size': self.max_sessions,
+                'hits': self.hits,
+                'misses': self.misses,
+                'upgrades': self.upgrades,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0,
+                'keys': list(self._sessions.keys())
+            }
@@ -0,0 +1,54 @@
+from season_index import SeasonIndex
+
+LEDGER_COLUMNS = ['Round', 'Session', 'DriverId', 'Abbreviation', 'FullName', 'TeamName', 'Position', 'Points']
+
+
+class PointsLedger(SeasonIndex):
+    """Per-season ledger of points scored in every race and sprint
+
+    Each (round, session) is ingested once from its results and persisted, so
+    standings after round N only load the rounds that are not in the ledger yet.
+    loader(year, round_number, session_type) returns the session results.
+    """
+
+    columns = LEDGER_COLUMNS
+
+    def session_types(self, event):
+        if 'sprint' in str(event['EventFormat']):
+            return ['R', 'S']
+        return ['R']
+
+    def rows(self, year, round_number, session_type, data):
+        if data is None:
+            return None
+        return data[['DriverId', 'Abbreviation', 'FullName', 'TeamName', 'Position', 'Points']].copy()
+
+
+def _rank(points, ledger, by):
+    # Order by points, then count-back on race finishes (most wins, then most 2nds, ...)
+    races = ledger[ledger['Session'] == 'R'].dropna(subset=['Position'])
+    finishes = races.pivot_table(index=by, columns='Position', aggfunc='size', fill_value=0)
+    finishes.columns = [f"P{int(p)}" for p in finishes.columns]
+    table = points.join(finishes, how='left').fillna({c: 0 for c in finishes.columns})
+    table['Wins'] = table['P1'].astype(int) if 'P1' in table else 0
+    table = table.sort_values(['Points'] + list(finishes.columns), ascending=False)
+    table['Position'] = range(1, len(table) + 1)
+    return table.drop(columns=list(finishes.columns))
+
+def driver_standings(ledger):
+    """Compute the drivers' championship from ledger rows"""
+    # Latest round's name and team for drivers who changed seats during the season
+    latest = ledger.sort_values('Round').groupby('DriverId')[['Abbreviation', 'FullName', 'TeamName']].last()
+    points = ledger.groupby('DriverId')[['Points']].sum().join(latest)
+    table = _rank(points, ledger, 'DriverId').reset_index()
+    table = table[['DriverId', 'Abbreviation', 'FullName', 'TeamName', 'Points', 'Position', 'Wins']]
+    table.columns = ['Driver ID', 'Abbreviation', 'Full Name', 'Team', 'Points', 'Position', 'Wins']
+    return table.reset_index(drop=True)
+
+def constructor_standings(ledger):
+    """Compute the constructors' championship from ledger rows"""
+    points = ledger.groupby('TeamName')[['Points']].sum()
+    table = _rank(points, ledger, 'TeamName').reset_index()
+    table = table[['Position', 'TeamName', 'Points', 'Wins']]
+    table.columns = ['Position', 'Team', 'Points', 'Wins']
+    return table.reset_index(drop=True)
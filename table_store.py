@@ -0,0 +1,108 @@
+import functools
+import os
+import threading
+from pathlib import Path
+import pyarrow as pa
+
+
+class TableStore:
+    """Materialized section tables stored as Arrow IPC files per (year, round, section)
+
+    Warm reads memory-map the file and never touch FastF1. Tables are
+    invalidated by deleting them (invalidate_sections) when the data they were
+    built from changes, or rebuilt when the is_stale hook says their session
+    is due for a refresh.
+    """
+
+    def __init__(self, root, enabled=True, is_stale=None):
+        self.root = Path(root)
+        self.enabled = enabled
+        # is_stale(year, round_number, section) -> True to rebuild a table instead of reading it
+        self.is_stale = is_stale
+        self.hits = 0
+        self.misses = 0
+
+    def _round_dir(self, year, round_number):
+        return self.root / str(int(year)) / f"{int(round_number):02d}"
+
+    def _path(self, year, round_number, section):
+        return self._round_dir(year, round_number) / f"{section}.arrow"
+
+    def read(self, year, round_number, section, version=1):
+        """Read a materialized table, or None if missing or built by another getter version"""
+        path = self._path(year, round_number, section)
+        if not path.exists():
+            return None
+        try:
+            with pa.memory_map(str(path), 'r') as source:
+                table = pa.ipc.open_file(source).read_all()
+        except (OSError, pa.ArrowInvalid):
+            return None
+
+        metadata = table.schema.metadata or {}
+        if int(metadata.get(b'f1rdf_getter_version', 1)) != version:
+            return None
+        return table.to_pandas()
+
+    def write(self, year, round_number, section, data, version=1):
+        """Materialize a section table for later reads"""
+        table = pa.Table.from_pandas(data)
+        metadata = dict(table.schema.metadata or {})
+        metadata[b'f1rdf_getter_version'] = str(version).encode()
+        table = table.replace_schema_metadata(metadata)
+
+        path = self._path(year, round_number, section)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial table
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with pa.OSFile(str(tmp_path), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    def invalidate_sections(self, year, round_number, sections):
+        """Delete the tables of some sections of a round, leaving the others valid"""
+        for section in sections:
+            self._path(year, round_number, section).unlink(missing_ok=True)
+
+    def materialized(self, section, version=1):
+        """Decorate a getter(year, round_number) so its table is read from the store when present
+
+        Bump version whenever the getter's output changes, so tables written by
+        the previous code are rebuilt.
+        """
+        def decorator(getter):
+            @functools.wraps(getter)
+            def wrapper(year, round_number):
+                if not self.enabled:
+                    return getter(year, round_number)
+
+                stale = self.is_stale is not None and self.is_stale(year, round_number, section)
+                data = None if stale else self.read(year, round_number, section, version)
+                if data is not None:
+                    self.hits += 1
+                    return data
+
+                self.misses += 1
+                data = getter(year, round_number)
+                if data is not None:
+                    try:
+                        self.write(year, round_number, section, data, version)
+                    except (OSError, pa.ArrowException) as e:
+                        print(f"Error materializing {section}: {str(e)}")
+                return data
+            return wrapper
+        return decorator
+
+    def stats(self):
+        """Get hit/miss counters and size of the materialized tables"""
+        files = list(self.root.rglob('*.arrow')) if self.root.exists() else []
+        total = self.hits + self.misses
+        return {
+            'path': str(self.root),
+            'tables': len(files),
+            'size_mb': round(sum(f.stat().st_size for f in files) / (1024 * 1024), 2),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
@@ -0,0 +1,71 @@
+import numpy as np
+
+# Channels offered in the telemetry explorer, plotted against lap distance
+TELEMETRY_CHANNELS = ['Speed', 'Throttle', 'Brake', 'nGear', 'RPM', 'DRS']
+
+DEFAULT_RESOLUTION = 800
+
+def lttb(x, y, threshold):
+    """Downsample a series to `threshold` points with Largest-Triangle-Three-Buckets
+
+    Keeps the first and last points and, from each bucket in between, the point
+    forming the largest triangle with the previously kept point and the mean of
+    the next bucket. Peaks and braking points survive, unlike with plain striding.
+    Returns the kept indices.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    edges = np.append(edges, n)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2]
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+def downsample_telemetry(telemetry, channels=TELEMETRY_CHANNELS, resolution=DEFAULT_RESOLUTION):
+    """Downsample each channel of one lap's telemetry against distance
+
+    Every channel gets its own LTTB selection so each keeps its shape.
+    Returns {channel: (distance, values)} as float arrays.
+    """
+    distance = telemetry['Distance'].to_numpy(dtype=float)
+    traces = {}
+    for channel in channels:
+        if channel not in telemetry.columns:
+            continue
+        values = telemetry[channel].to_numpy(dtype=float)
+        valid = ~(np.isnan(distance) | np.isnan(values))
+        x, y = distance[valid], values[valid]
+        keep = lttb(x, y, resolution)
+        traces[channel] = (x[keep], y[keep])
+    return traces
+
+def plot_telemetry(driver_traces, channels):
+    """Plot downsampled traces of several drivers, one subplot per channel
+
+    driver_traces maps a label (e.g. 'VER lap 12') to downsample_telemetry() output.
+    """
+    from matplotlib.figure import Figure  # Only needed once a plot is drawn
+    fig = Figure(figsize=(12, 2.2 * len(channels)))
+    axes = fig.subplots(len(channels), 1, sharex=True, squeeze=False)[:, 0]
+    for ax, channel in zip(axes, channels):
+        for label, traces in driver_traces.items():
+            if channel in traces:
+                ax.plot(*traces[channel], label=label, linewidth=1)
+        ax.set_ylabel(channel)
+        ax.grid(alpha=0.3)
+    axes[0].legend(loc='upper right', fontsize='small')
+    axes[-1].set_xlabel('Distance (m)')
+    fig.tight_layout()
+    return fig
@@ -1,19 +1,23 @@
 from datetime import datetime
+import functools
+import os
 import streamlit as st
 import pandas as pd
-import io
-import zipfile
 import base64
-import json
-from app import load_schedule, load_race_results, get_driver_standings, get_circuit_info, get_constructor_results, get_constructor_standings, get_constructors_data, get_drivers_data, get_lap_times, get_pit_stops, get_qualifying_results, get_races_data, get_season_data, get_sprint_results, get_status_data
-
-# Add background image
-def add_bg_from_local(image_file):
+from app import EVENT_INDEX, get_lap_telemetry, get_unavailable_sections, get_session_cache_stats, CACHE_MANAGER, TABLE_STORE
+from metrics import METRICS
+from telemetry import DEFAULT_RESOLUTION, TELEMETRY_CHANNELS, plot_telemetry
+from fetcher import fetch_sections
+from compaction import apply_memory_budget
+from exports import ExportCache, EXPORT_FORMATS, convert_to_serializable, section_filename
+
+@functools.lru_cache(maxsize=None)
+def background_css(image_file):
+    """Build the page style with the background image inlined, once per server process"""
     with open(image_file, "rb") as f:
         encoded_string = base64.b64encode(f.read()).decode()
-    
-    st.markdown(
-        f"""
+
+    return f"""
         <style>
         .stApp {{
             background: linear-gradient(rgba(0,0,0,0.8), rgba(0,0,0,0.8)), url("data:image/avif;base64,{encoded_string}");
@@ -26,65 +30,49 @@ def add_bg_from_local(image_file):
             color: white;
         }}
         </style>
-        """,
-        unsafe_allow_html=True
-    )
+        """
+
+# Add background image
+def add_bg_from_local(image_file):
+    st.markdown(background_css(image_file), unsafe_allow_html=True)
 
 # Set page config and background
 st.set_page_config(layout="wide")
 add_bg_from_local('images/f1.avif')
 
+# Optional background cache warm-up, started once per server process
+if os.environ.get("F1RDF_WARMER") == "1":
+    from warmer import start_background_warmer
+    start_background_warmer()
+
 st.sidebar.markdown(
     "<h1 style='color: #FF1E00; font-weight: bold; font-size: 48px;'>F1RDF 🏎️</h1>", 
     unsafe_allow_html=True
 )
 
-# Add New Chat button
-if st.sidebar.button("Home", key="new_chat", type="secondary", use_container_width=True):
+def clear_fetched_data():
+    """Forget this session's fetched sections and the export bytes built from them"""
     st.session_state.data_fetched = False
     st.session_state.fetched_data = {}
+    if 'export_cache' in st.session_state:
+        st.session_state.export_cache.clear()
+
+# Add New Chat button
+if st.sidebar.button("Home", key="new_chat", type="secondary", use_container_width=True):
+    clear_fetched_data()
     st.rerun()
 
-# Update F1 races list (remove round numbers from names)
-f1_races = [
-    "Australian Grand Prix",
-    "Chinese Grand Prix",
-    "Japanese Grand Prix",
-    "Bahrain Grand Prix",
-    "Saudi Arabian Grand Prix",
-    "Miami Grand Prix",
-    "Emilia Romagna Grand Prix",
-    "Monaco Grand Prix",
-    "Spanish Grand Prix",
-    "Canadian Grand Prix",
-    "Austrian Grand Prix",
-    "British Grand Prix",
-    "Belgian Grand Prix",
-    "Hungarian Grand Prix",
-    "Dutch Grand Prix",
-    "Italian Grand Prix",
-    "Azerbaijan Grand Prix",
-    "Singapore Grand Prix",
-    "United States Grand Prix",
-    "Mexico City Grand Prix",
-    "São Paulo Grand Prix",
-    "Las Vegas Grand Prix",
-    "Qatar Grand Prix",
-    "Abu Dhabi Grand Prix"
-]
-
-def convert_to_serializable(obj):
-    """Convert non-serializable objects to serializable format"""
-    if pd.isna(obj):
-        return None
-    elif isinstance(obj, pd.Timestamp):
-        return obj.isoformat()
-    elif isinstance(obj, dict):
-        return {k: convert_to_serializable(v) for k, v in obj.items()}
-    elif isinstance(obj, (list, tuple)):
-        return [convert_to_serializable(item) for item in obj]
-    else:
-        return obj
+def render_debug_panel():
+    """Show recent per-section timings and cache counters"""
+    with st.expander("🛠 Debug Metrics", expanded=False):
+        if METRICS.recent:
+            st.dataframe(pd.DataFrame(list(METRICS.recent)[::-1]), use_container_width=True)
+        st.json({
+            "session_cache": get_session_cache_stats(),
+            "disk_cache": CACHE_MANAGER.stats(),
+            "tables": TABLE_STORE.stats()
+        })
+        st.code(METRICS.render_prometheus(), language="text")
 
 def main():
     # Initialize session state first
@@ -102,10 +90,12 @@ def main():
         st.session_state.select_all = False
     if 'active_view' not in st.session_state:
         st.session_state.active_view = 'fetcher'
+    if 'export_cache' not in st.session_state:
+        st.session_state.export_cache = ExportCache()
 
     st.markdown("<h1 class='title'>Formula 1 Race Data Fetcher</h1>", unsafe_allow_html=True)
 
-    toggle_col1, toggle_col2 = st.columns(2)
+    toggle_col1, toggle_col2, toggle_col3 = st.columns(3)
     with toggle_col1:
         fetcher_type = "primary" if st.session_state.active_view == 'fetcher' else "secondary"
         if st.button("Data Fetcher", key="view_fetcher", type=fetcher_type, use_container_width=True):
@@ -116,6 +106,11 @@ def main():
         if st.button("Race Calendar", key="view_calendar", type=calendar_type, use_container_width=True):
             st.session_state.active_view = 'calendar'
             st.rerun()
+    with toggle_col3:
+        telemetry_type = "primary" if st.session_state.active_view == 'telemetry' else "secondary"
+        if st.button("Telemetry", key="view_telemetry", type=telemetry_type, use_container_width=True):
+            st.session_state.active_view = 'telemetry'
+            st.rerun()
     st.markdown("---")
     
     # Sidebar with year selection
@@ -125,26 +120,28 @@ def main():
         default_year = current_year - 1 if current_year == 2026 else current_year
         year = st.selectbox("Select Year", range(default_year, 1950, -1), index=0)
         
-        # Load schedule for selected year
+        # Events come from the on-disk index; only an unindexed season fetches its schedule
         try:
-            schedule = load_schedule(year)
+            schedule = EVENT_INDEX.events(year)
         except ValueError:
             st.error(f"Schedule data not available for {year}. Please select a different year.")
             return
-        
-        available_races = schedule['EventName'].tolist()
-        filtered_races = [race for race in f1_races if any(race.lower() in ar.lower() for ar in available_races)]
-        
-        if not filtered_races:
-            filtered_races = available_races
-        
-        selected_race_name = st.selectbox("Select Grand Prix", filtered_races)
-        
+        # Pre-season testing has no race to fetch
+        events = schedule[schedule['RoundNumber'] > 0]
+        rounds = dict(zip(events['EventName'], events['RoundNumber']))
+
+        selected_race_name = st.selectbox("Select Grand Prix", list(rounds))
+
         round_number = None
         if selected_race_name:
-            race_info = schedule[schedule['EventName'] == selected_race_name]
-            if not race_info.empty:
-                round_number = race_info.iloc[0]['RoundNumber']
+            round_number = int(rounds[selected_race_name])
+
+        search = st.text_input("Search all seasons", placeholder="e.g. Monaco", key="event_search")
+        if search:
+            matches = EVENT_INDEX.search(search)
+            st.dataframe(matches[['Year', 'RoundNumber', 'EventName', 'Location']].rename(columns={'RoundNumber': 'Round'}),
+                         hide_index=True, use_container_width=True)
+            st.caption(f"{len(matches)} events in {len(EVENT_INDEX.indexed_years())} indexed seasons")
 
         st.sidebar.markdown("")
         st.sidebar.markdown("## About")
@@ -172,8 +169,7 @@ def main():
     # Check if selection changed - if yes, reset data_fetched
     if (st.session_state.selected_year != year or 
         st.session_state.selected_race != selected_race_name):
-        st.session_state.data_fetched = False
-        st.session_state.fetched_data = {}
+        clear_fetched_data()
         st.session_state.selected_year = year
         st.session_state.selected_race = selected_race_name
         st.session_state.selected_round = round_number
@@ -185,6 +181,37 @@ def main():
         schedule_df = schedule[['RoundNumber', 'EventName', 'Country', 'EventDate', 'Location']]
         st.dataframe(schedule_df, use_container_width=True)
 
+    # Main Content Area — Telemetry view (nothing is loaded until a plot is requested)
+    elif st.session_state.active_view == 'telemetry':
+        st.subheader(f"Telemetry - {selected_race_name} {year}")
+        if year < 2018:
+            st.info("Telemetry is only available from the 2018 season onwards.")
+        elif round_number:
+            tel_col1, tel_col2 = st.columns(2)
+            with tel_col1:
+                drivers_text = st.text_input("Drivers (abbreviations, comma separated)", value="VER, HAM", key="telemetry_drivers")
+                lap_number = st.number_input("Lap", min_value=1, value=1, step=1, key="telemetry_lap")
+            with tel_col2:
+                channels = st.multiselect("Channels", TELEMETRY_CHANNELS, default=['Speed', 'Throttle', 'Brake'], key="telemetry_channels")
+                resolution = st.slider("Points per trace", min_value=200, max_value=3000, value=DEFAULT_RESOLUTION, step=100, key="telemetry_resolution")
+
+            if st.button("📈 Plot Telemetry", key="plot_telemetry", type="primary", use_container_width=True):
+                drivers = [d.strip().upper() for d in drivers_text.split(',') if d.strip()]
+                driver_traces = {}
+                with st.spinner('🏎️ Loading telemetry...'):
+                    for driver in drivers:
+                        try:
+                            traces = get_lap_telemetry(year, round_number, driver, int(lap_number), resolution)
+                        except Exception as e:
+                            st.error(f"Error loading telemetry for {driver}: {str(e)}")
+                            continue
+                        if traces is None:
+                            st.warning(f"No lap {int(lap_number)} for {driver}.")
+                        else:
+                            driver_traces[f"{driver} lap {int(lap_number)}"] = traces
+                if driver_traces and channels:
+                    st.pyplot(plot_telemetry(driver_traces, channels))
+
     # Main Content Area — Data Fetcher view
     elif st.session_state.active_view == 'fetcher':
         if not st.session_state.data_fetched:
@@ -199,6 +226,8 @@ def main():
                     ("Drivers Data", "👨‍✈️", "drivers_data"),
                     ("Lap Times", "⏱", "lap_times"),
                     ("Pit Stops Data", "🔧", "pit_stops"),
+                    ("Lap Analysis", "📈", "lap_analysis"),
+                    ("Tyre Stints", "🛞", "stint_summary"),
                     ("Qualifying Results", "⏳", "qualifying_results"),
                     ("Races Data", "🚥", "races_data"),
                     ("Season Data", "📅", "season_data"),
@@ -210,6 +239,8 @@ def main():
 
                 col1, col2 = st.columns(2)
                 selected_sections = {}
+                # Sections that cannot exist for this round (no sprint, no timing data) are greyed out
+                unavailable = get_unavailable_sections(year, round_number)
 
                 mid_point = len(sections) // 2
                 for i, (name, icon, key) in enumerate(sections):
@@ -218,8 +249,10 @@ def main():
                         selected_sections[key] = st.checkbox(
                             f"{icon} {name}",
                             key=f"check_{key}",
-                            value=st.session_state.select_all
-                        )
+                            value=st.session_state.select_all and key not in unavailable,
+                            disabled=key in unavailable,
+                            help=unavailable.get(key)
+                        ) and key not in unavailable
 
                 st.markdown("")
                 selected_count = sum(selected_sections.values())
@@ -241,36 +274,16 @@ def main():
                         else:
                             with st.spinner('🏎️ Fetching race data...'):
                                 progress_bar = st.progress(0)
-                                total_sections = sum(selected_sections.values())
-                                completed = 0
-
-                                fetch_functions = {
-                                    "race_results": lambda: load_race_results(year, round_number),
-                                    "driver_standings": lambda: get_driver_standings(year, round_number),
-                                    "circuit_info": lambda: get_circuit_info(year, round_number),
-                                    "constructor_results": lambda: get_constructor_results(year, round_number),
-                                    "constructor_standings": lambda: get_constructor_standings(year, round_number),
-                                    "constructors_data": lambda: get_constructors_data(year, round_number),
-                                    "drivers_data": lambda: get_drivers_data(year, round_number),
-                                    "lap_times": lambda: get_lap_times(year, round_number),
-                                    "pit_stops": lambda: get_pit_stops(year, round_number),
-                                    "qualifying_results": lambda: get_qualifying_results(year, round_number),
-                                    "races_data": lambda: get_races_data(year),
-                                    "season_data": lambda: get_season_data(year),
-                                    "sprint_results": lambda: get_sprint_results(year, round_number),
-                                    "status_data": lambda: get_status_data(year, round_number)
-                                }
-
-                                for key, is_selected in selected_sections.items():
-                                    if is_selected:
-                                        try:
-                                            st.session_state.fetched_data[key] = fetch_functions[key]()
-                                            completed += 1
-                                            progress_bar.progress(completed / total_sections)
-                                        except Exception as e:
-                                            st.session_state.fetched_data[key] = f"Error: {str(e)}"
-                                            completed += 1
-                                            progress_bar.progress(completed / total_sections)
+                                selected_keys = [k for k, v in selected_sections.items() if v]
+
+                                fetched = fetch_sections(
+                                    year, round_number, selected_keys,
+                                    on_done=lambda key, completed, total: progress_bar.progress(completed / total)
+                                )
+                                # Every browser session keeps its own copy, so bound what one user holds
+                                st.session_state.fetched_data = apply_memory_budget(
+                                    {**st.session_state.fetched_data, **fetched}
+                                )
 
                                 progress_bar.empty()
                                 st.session_state.data_fetched = True
@@ -278,50 +291,27 @@ def main():
                                 st.rerun()
 
         if st.session_state.data_fetched and st.session_state.fetched_data:
+            # Download payloads are serialized on click, at most once per fetched table
+            export_cache = st.session_state.export_cache
+            export_format = st.selectbox(
+                "Export Format", list(EXPORT_FORMATS), key="export_format",
+                help="CSV writes times as HH:MM:SS.mmm; Parquet and Feather keep them as native durations"
+            )
             col1, col2 = st.columns([1, 1])
 
             with col1:
                 if st.button("🔄 Fetch Different Data", type="secondary", use_container_width=True):
-                    st.session_state.data_fetched = False
-                    st.session_state.fetched_data = {}
+                    clear_fetched_data()
                     st.session_state.select_all = False
                     st.rerun()
 
             with col2:
                 if len(st.session_state.fetched_data) >= 1:
-                    zip_buffer = io.BytesIO()
-                    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                        for key, data in st.session_state.fetched_data.items():
-                            if not (isinstance(data, str) and data.startswith("Error")) and data is not None:
-                                if isinstance(data, dict):
-                                    serializable_data = convert_to_serializable(data)
-                                    json_data = json.dumps(serializable_data, indent=2)
-                                    zip_file.writestr("circuit_info.json", json_data)
-                                else:
-                                    csv_data = data.to_csv(index=False)
-                                    section_titles_map = {
-                                        "race_results": "race_results.csv",
-                                        "driver_standings": "driver_standings.csv",
-                                        "circuit_info": "circuit_info.json",
-                                        "constructor_results": "constructor_results.csv",
-                                        "constructor_standings": "constructor_standings.csv",
-                                        "constructors_data": "constructors_data.csv",
-                                        "drivers_data": "drivers_data.csv",
-                                        "lap_times": "lap_times.csv",
-                                        "pit_stops": "pit_stops.csv",
-                                        "qualifying_results": "qualifying_results.csv",
-                                        "races_data": "races_data.csv",
-                                        "season_data": "season_data.csv",
-                                        "sprint_results": "sprint_results.csv",
-                                        "status_data": "status_data.csv"
-                                    }
-                                    filename = section_titles_map.get(key, f"{key}.csv")
-                                    zip_file.writestr(filename, csv_data)
-
-                    zip_buffer.seek(0)
+                    # Built only when the button is clicked, from the cached per-section bytes
+                    fetched_data = dict(st.session_state.fetched_data)
                     st.download_button(
                         label="📦 Download All Files (ZIP)",
-                        data=zip_buffer.getvalue(),
+                        data=lambda: export_cache.build_zip(fetched_data, export_format),
                         file_name=f"F1_Data_{st.session_state.selected_year}_{st.session_state.selected_race.replace(' ', '_')}.zip",
                         mime="application/zip",
                         type="primary",
@@ -344,6 +334,8 @@ def main():
                 "drivers_data": ("👨‍✈️ Drivers Data", "drivers_data.csv"),
                 "lap_times": ("⏱ Lap Times", "lap_times.csv"),
                 "pit_stops": ("🔧 Pit Stops Data", "pit_stops.csv"),
+                "lap_analysis": ("📈 Lap Analysis", "lap_analysis.csv"),
+                "stint_summary": ("🛞 Tyre Stints", "stint_summary.csv"),
                 "qualifying_results": ("⏳ Qualifying Results", "qualifying_results.csv"),
                 "races_data": ("🚥 Races Data", "races_data.csv"),
                 "season_data": ("📅 Season Data", "season_data.csv"),
@@ -351,42 +343,50 @@ def main():
                 "status_data": ("✅ Status Data", "status_data.csv")
             }
 
-            for key, data in st.session_state.fetched_data.items():
-                if key in section_titles:
-                    title, filename = section_titles[key]
-                    with st.expander(title, expanded=False):
-                        if isinstance(data, str) and data.startswith("Error"):
-                            st.error(data)
-                        elif data is None:
-                            st.info("No data available for this section.")
-                        elif isinstance(data, dict):
-                            serializable_data = convert_to_serializable(data)
-                            for k, v in serializable_data.items():
-                                if isinstance(v, dict):
-                                    st.write(f"**{k.replace('_', ' ').title()}:**")
-                                    st.json(v)
-                                else:
-                                    st.write(f"**{k.replace('_', ' ').title()}:** {v}")
-                            json_data = json.dumps(serializable_data, indent=2)
-                            st.download_button(
-                                label=f"📥 Download {title}",
-                                data=json_data,
-                                file_name=filename,
-                                mime="application/json",
-                                key=f"download_{key}",
-                                use_container_width=True
-                            )
-                        else:
-                            st.dataframe(data, use_container_width=True)
-                            csv = data.to_csv(index=False)
-                            st.download_button(
-                                label=f"📥 Download {title}",
-                                data=csv,
-                                file_name=filename,
-                                mime="text/csv",
-                                key=f"download_{key}",
-                                use_container_width=True
-                            )
+            # Only the section being viewed is rendered; the others cost nothing on a rerun
+            shown = [key for key in st.session_state.fetched_data if key in section_titles]
+            if shown:
+                key = st.selectbox("Show Section", shown, key="shown_section",
+                                   format_func=lambda key: section_titles[key][0])
+                data = st.session_state.fetched_data[key]
+                title, filename = section_titles[key]
+                with st.container(border=True):
+                    if isinstance(data, str) and data.startswith("Error: Not cached"):
+                        st.info(data[len("Error: "):])
+                    elif isinstance(data, str) and data.startswith("Error"):
+                        st.error(data)
+                    elif data is None:
+                        st.info("No data available for this section.")
+                    elif isinstance(data, dict):
+                        serializable_data = convert_to_serializable(data)
+                        for k, v in serializable_data.items():
+                            if isinstance(v, dict):
+                                st.write(f"**{k.replace('_', ' ').title()}:**")
+                                st.json(v)
+                            else:
+                                st.write(f"**{k.replace('_', ' ').title()}:** {v}")
+                        st.download_button(
+                            label=f"📥 Download {title}",
+                            data=lambda key=key, data=data: export_cache.get(key, data)[0],
+                            file_name=filename,
+                            mime="application/json",
+                            key=f"download_{key}",
+                            use_container_width=True
+                        )
+                    else:
+                        st.dataframe(data, use_container_width=True)
+                        st.download_button(
+                            label=f"📥 Download {title}",
+                            data=lambda key=key, data=data: export_cache.get(key, data, export_format)[0],
+                            file_name=section_filename(key, export_format),
+                            mime=EXPORT_FORMATS[export_format][1],
+                            key=f"download_{key}",
+                            use_container_width=True
+                        )
+
+    # Hidden debug panel: add ?debug=1 to the URL (or set F1RDF_DEBUG=1)
+    if st.query_params.get("debug") == "1" or os.environ.get("F1RDF_DEBUG") == "1":
+        render_debug_panel()
 
 if __name__ == '__main__':
     main()
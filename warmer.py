@@ -0,0 +1,165 @@
+"""Preload finished sessions and their section tables into the caches
+
+Run once for arbitrary seasons:
+    python warmer.py --years 2022-2024
+
+Or keep warming new sessions as they finish:
+    python warmer.py --watch --interval 1800
+
+The Streamlit app starts the same background loop when F1RDF_WARMER=1.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
+from app import (CACHE_MANAGER, PIT_STOP_INDEX, SECTION_REQUIREMENTS, get_loaded_session, get_unavailable_sections,
+                 is_historical, load_schedule)
+from bulk_export import parse_years
+from fetcher import SECTION_FETCHERS
+from freshness import SESSION_DURATIONS, session_type_of, utc_now
+
+STATE_FILE = CACHE_MANAGER.cache_dir / "warmer_state.json"
+WARMER_WORKERS = int(os.environ.get("F1RDF_WARMER_WORKERS", 2))
+WARMER_INTERVAL = int(os.environ.get("F1RDF_WARMER_INTERVAL", 1800))
+# Runs a failing session is retried in before it is given up (data never published, cancelled rounds)
+WARMER_MAX_ATTEMPTS = int(os.environ.get("F1RDF_WARMER_MAX_ATTEMPTS", 5))
+
+def finished_sessions(year, schedule, since=None, until=None):
+    """Get (round, session type) of sessions of a season that ended in (since, until]"""
+    until = until if until is not None else utc_now()
+    sessions = []
+    for _, event in schedule[schedule['RoundNumber'] > 0].iterrows():
+        for i in range(1, 6):
+            session_type = session_type_of(year, event[f'Session{i}'])
+            start = event[f'Session{i}DateUtc']
+            if session_type is None or pd.isna(start):
+                continue
+            end = start + SESSION_DURATIONS[session_type]
+            key = (int(event['RoundNumber']), session_type)
+            if end <= until and (since is None or end > since) and key not in sessions:
+                sessions.append(key)
+    return sessions
+
+def warm_session(year, round_number, session_type):
+    """Load one session with everything its sections need and materialize their tables"""
+    unavailable = get_unavailable_sections(year, round_number)
+    sections = [s for s, (t, _) in SECTION_REQUIREMENTS.items() if t == session_type and s not in unavailable]
+    parts = set().union(*(SECTION_REQUIREMENTS[s][1] for s in sections))
+    if not is_historical(year):
+        get_loaded_session(year, round_number, session_type, parts)
+    for section in sections:
+        SECTION_FETCHERS[section](year, round_number)
+    if 'pit_stops' in sections:
+        # Season-wide pit stop queries then need no session loads
+        PIT_STOP_INDEX.get(year, round_number)
+    return len(sections)
+
+def warm(sessions, workers=WARMER_WORKERS):
+    """Warm (year, round, session type) triples with bounded concurrency, returning the ones that failed"""
+    failures = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(warm_session, *session): session for session in sessions}
+        for future in as_completed(futures):
+            year, round_number, session_type = futures[future]
+            try:
+                count = future.result()
+                print(f"Warmed {year} round {round_number} {session_type} ({count} sections)")
+            except Exception as e:
+                failures.append((year, round_number, session_type))
+                print(f"Error warming {year} round {round_number} {session_type}: {str(e)}")
+    return failures
+
+def load_state():
+    if not STATE_FILE.exists():
+        return {}
+    with open(STATE_FILE) as f:
+        return json.load(f)
+
+def save_state(state):
+    tmp_path = STATE_FILE.with_suffix(".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, STATE_FILE)
+
+def warm_recent(workers=WARMER_WORKERS):
+    """Warm every session that finished since the previous run (or in the last week on the first run)
+
+    Sessions that fail are retried on the next runs, up to WARMER_MAX_ATTEMPTS
+    times each, without holding back the others.
+    """
+    now = utc_now()
+    state = load_state()
+    since = pd.Timestamp(state['last_run']) if 'last_run' in state else now - pd.Timedelta(days=7)
+    # "year:round:type" -> failed attempts so far
+    attempts = state.get('retry', {})
+
+    sessions = [(int(y), int(r), t) for y, r, t in (key.split(':') for key in attempts)]
+    # A run early in January still has last season's finale to pick up
+    for year in sorted({since.year, now.year}):
+        try:
+            schedule = load_schedule(year)
+        except Exception as e:
+            print(f"Error loading {year} schedule: {str(e)}")
+            continue
+        sessions += [(year, r, t) for r, t in finished_sessions(year, schedule, since, now) if (year, r, t) not in sessions]
+
+    failures = warm(sessions, workers)
+    retry = {}
+    for year, round_number, session_type in failures:
+        key = f"{year}:{round_number}:{session_type}"
+        if attempts.get(key, 0) + 1 < WARMER_MAX_ATTEMPTS:
+            retry[key] = attempts.get(key, 0) + 1
+        else:
+            print(f"Giving up warming {year} round {round_number} {session_type} after {WARMER_MAX_ATTEMPTS} attempts")
+    save_state({'last_run': now.isoformat(), 'retry': retry})
+    return len(failures)
+
+_warmer_lock = threading.Lock()
+_warmer_thread = None
+
+def start_background_warmer(interval=WARMER_INTERVAL, workers=WARMER_WORKERS):
+    """Start the warm-up loop in a daemon thread, once per process"""
+    global _warmer_thread
+    with _warmer_lock:
+        if _warmer_thread is not None and _warmer_thread.is_alive():
+            return _warmer_thread
+
+        def _loop():
+            while True:
+                try:
+                    warm_recent(workers)
+                except Exception as e:
+                    print(f"Error in cache warmer: {str(e)}")
+                time.sleep(interval)
+
+        _warmer_thread = threading.Thread(target=_loop, name="f1rdf-warmer", daemon=True)
+        _warmer_thread.start()
+        return _warmer_thread
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm the F1 data caches")
+    parser.add_argument("--years", help="Warm every finished session of these years, e.g. 2022-2024")
+    parser.add_argument("--watch", action="store_true", help="Keep warming newly finished sessions")
+    parser.add_argument("--interval", type=int, default=WARMER_INTERVAL, help="Seconds between --watch runs")
+    parser.add_argument("--workers", type=int, default=WARMER_WORKERS, help="Sessions warmed concurrently")
+    args = parser.parse_args()
+
+    failures = 0
+    if args.years:
+        sessions = []
+        for year in parse_years(args.years):
+            sessions += [(year, r, t) for r, t in finished_sessions(year, load_schedule(year))]
+        failures += len(warm(sessions, args.workers))
+    if args.watch:
+        while True:
+            warm_recent(args.workers)
+            time.sleep(args.interval)
+    elif not args.years:
+        failures += warm_recent(args.workers)
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()